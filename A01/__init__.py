@@ -0,0 +1,12 @@
+"""
+Grid layout optimization: compiled problem instances, objectives and
+solvers, importable as a package from the repository root, e.g.
+`from A01 import LayoutProblem, solvers`. The assignment scripts also run
+from this directory, e.g. `python tollander_A_1_2.py`. The exact solver
+needs scipy and is imported on its own, `from A01 import qap`.
+"""
+from . import pareto, schedules, solvers
+from .memo import MemoizedObjective
+from .pareto import ParetoArchive
+from .problem import LayoutProblem, neighbor_index
+from .telemetry import Trace
@@ -0,0 +1,58 @@
+"""
+Memoization of objective functions with the signature
+`obj_f(layout, columns, o_inputs)` used by the solvers.
+"""
+from array import array
+from collections import OrderedDict
+
+
+class MemoizedObjective:
+    """
+    Wraps an objective function with a bounded least-recently-used cache of
+    objective values.
+    - A layout is keyed by the bytes of its element ids, which are assigned
+      to element names as they are first seen
+    - The key also includes the columns and the identities of the inputs,
+      so calls with different inputs do not share values; the memo keeps a
+      reference to every input so that the identities stay unique
+    - `hits` and `misses` count the cache lookups
+    """
+
+    def __init__(self, obj_f, maxsize=2 ** 16):
+        self.obj_f = obj_f
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.ids = {}
+        self.inputs = {}
+
+    def key(self, layout, columns, o_inputs):
+        ids = self.ids
+        for e in layout:
+            if e not in ids:
+                ids[e] = len(ids)
+        for o in o_inputs:
+            self.inputs.setdefault(id(o), o)
+        code = array('I', [ids[e] for e in layout]).tobytes()
+        return columns, tuple(map(id, o_inputs)), code
+
+    def __call__(self, layout, columns, o_inputs):
+        key = self.key(layout, columns, o_inputs)
+        try:
+            ov = self.cache[key]
+        except KeyError:
+            self.misses += 1
+            ov = self.obj_f(layout, columns, o_inputs)
+            self.cache[key] = ov
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        else:
+            self.hits += 1
+            self.cache.move_to_end(key)
+        return ov
+
+    def clear(self):
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
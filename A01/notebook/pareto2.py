@@ -1,25 +1,38 @@
+# The normalization pre-runs do not depend on the weights, so they are run
+# once per number of iterations and shared by the runs of all weights. The
+# random searches evaluate distinct layouts, so their objectives are not
+# memoized.
+e_weights_N = normalized(e_weights)
+associations_N = normalized(associations)
+normalization_runs = {}
+
+
+def normalization(iterations):
+    if iterations not in normalization_runs:
+        x1, zU1 = random_search(
+            iterations, seed_layout, columns, f1, e_weights_N)
+        x2, zU2 = random_search(
+            iterations, seed_layout, columns, f2, associations_N)
+        zN1 = max(f1(x1, columns, [e_weights]),
+                  f2(x1, columns, [associations]))
+        zN2 = max(f1(x2, columns, [e_weights]),
+                  f2(x2, columns, [associations]))
+        normalization_runs[iterations] = zU1, zN1, zU2, zN2
+    return normalization_runs[iterations]
+
+
 def pareto_optimal_design2(u1, iterations):
     assert 0 <= u1 <= 1
     u2 = 1 - u1
 
-    e_weights_N = normalized(e_weights)
-    associations_N = normalized(associations)
-
-    x1, zU1 = random_search(
-        iterations, seed_layout, columns, f1, normalized(e_weights))
-    x2, zU2 = random_search(
-        iterations, seed_layout, columns, f2, normalized(associations))
-    zN1 = max(f1(x1, columns, [e_weights]),
-              f2(x1, columns, [associations]))
-    zN2 = max(f1(x2, columns, [e_weights]),
-              f2(x2, columns, [associations]))
+    zU1, zN1, zU2, zN2 = normalization(iterations)
 
     def normalized_objective(u1, u2, layout, columns, o_inputs):
-        return u1 * f1(layout, columns, o_inputs[0:]) / (zN1 - zU1) + \
-               u2 * f2(layout, columns, o_inputs[1:]) / (zN2 - zU2)
+        return u1 * f1(layout, columns, o_inputs[0:1]) / (zN1 - zU1) + \
+               u2 * f2(layout, columns, o_inputs[1:2]) / (zN2 - zU2)
 
     winner, winner_score = random_search(
         iterations, seed_layout, columns,
         partial(normalized_objective, u1, u2),
-        normalized(e_weights), normalized(associations))
+        e_weights_N, associations_N)
     return winner, winner_score
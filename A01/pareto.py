@@ -0,0 +1,182 @@
+"""
+Pareto front of the two layout objectives of a compiled layout problem:
+selection time `f1 = problem.linear` and association distance
+`f2 = problem.quadratic`, both minimized.
+
+Instead of keeping only the winner of one scalarized optimization per
+weight, the solvers here add every evaluated layout to a shared
+non-dominated archive, so that one run produces the whole front.
+"""
+import math
+from bisect import bisect_left
+
+import numpy as np
+
+try:
+    from .problem import neighbor_index
+    from .schedules import calibrate
+except ImportError:
+    from problem import neighbor_index
+    from schedules import calibrate
+
+
+class ParetoArchive:
+    """
+    Non-dominated (f1, f2) points and the layouts (permutations) attaining
+    them.
+    - Points are sorted by increasing f1, and thus strictly decreasing f2
+    - A new point is located with a binary search, and the points it
+      dominates form a contiguous run after it
+    - Objective values are rounded to `digits` decimals, so that layouts
+      with equal values summed in a different order compare equal
+    """
+
+    def __init__(self, digits=12):
+        self.digits = digits
+        self.f1 = []
+        self.f2 = []
+        self.perms = []
+
+    def __len__(self):
+        return len(self.f1)
+
+    def dominates(self, f1, f2):
+        """Whether a point in the archive weakly dominates (f1, f2)."""
+        f1, f2 = round(f1, self.digits), round(f2, self.digits)
+        k = bisect_left(self.f1, f1)
+        return (k > 0 and self.f2[k - 1] <= f2) or \
+               (k < len(self.f1) and self.f1[k] == f1 and self.f2[k] <= f2)
+
+    def add(self, f1, f2, perm):
+        """
+        Adds the point unless it is dominated, and removes the points it
+        dominates. Returns whether the point was added.
+        """
+        if self.dominates(f1, f2):
+            return False
+        f1, f2 = round(f1, self.digits), round(f2, self.digits)
+        k = bisect_left(self.f1, f1)
+        end = k
+        while end < len(self.f2) and self.f2[end] >= f2:
+            end += 1
+        self.f1[k:end] = [f1]
+        self.f2[k:end] = [f2]
+        self.perms[k:end] = [np.array(perm)]
+        return True
+
+    def add_batch(self, f1, f2, perms):
+        """
+        Adds the non-dominated points of a batch. The points dominated
+        within the batch are filtered out with one sort before inserting.
+        """
+        f1, f2 = np.round(f1, self.digits), np.round(f2, self.digits)
+        order = np.lexsort((f2, f1))
+        f2_sorted = f2[order]
+        best_before = np.minimum.accumulate(
+            np.concatenate(([np.inf], f2_sorted[:-1])))
+        added = 0
+        for r in order[f2_sorted < best_before]:
+            added += self.add(float(f1[r]), float(f2[r]), perms[r])
+        return added
+
+    def front(self):
+        """Returns the points as an (m, 2) array sorted by f1."""
+        return np.column_stack((self.f1, self.f2))
+
+    def layouts(self, problem):
+        return [problem.decode(perm) for perm in self.perms]
+
+
+def pareto_random_search(max_iters, problem, layout, archive=None,
+                         batch_size=None, rng=None):
+    """Solver: Random search that adds every evaluated layout to the archive"""
+    rng = np.random.default_rng(rng)
+    if archive is None:
+        archive = ParetoArchive()
+    if batch_size is None:
+        batch_size = max(1, 2 ** 20 // max(1, len(problem.pairs_distance)))
+    perm = problem.encode(layout)
+    archive.add(problem.linear(perm), problem.quadratic(perm), perm)
+    for start in range(0, max_iters, batch_size):
+        size = min(batch_size, max_iters - start)
+        candidates = np.argsort(rng.random((size, problem.n)), axis=1)
+        archive.add_batch(problem.linear_batch(candidates),
+                          problem.quadratic_batch(candidates), candidates)
+    return archive
+
+
+def _anneal(k_max, problem, perm, cost, n, archive, rng):
+    """
+    Simulated annealing of `cost(f1, f2)` over swap moves, adding every
+    visited layout to the archive.
+    - The initial temperature accepts an average uphill move of the first
+      100 proposals with probability 0.8, and exponential cooling lowers it
+      by a factor of 1000 over the run
+    """
+    index = neighbor_index(problem.n, problem.columns, n)
+    f1, f2 = problem.linear(perm), problem.quadratic(perm)
+    c = cost(f1, f2)
+    archive.add(f1, f2, perm)
+
+    moves = []
+    for k in range(0, k_max):
+        i = rng.integers(0, problem.n)
+        j = index.sample(i, rng.random())
+        new_f1 = f1 + problem.linear_swap_delta(perm, i, j)
+        new_f2 = f2 + problem.quadratic_swap_delta(perm, i, j)
+        delta = cost(new_f1, new_f2) - c
+
+        if k < 100:
+            # Calibration: collect moves without accepting them
+            moves.append(delta)
+            if k == min(99, k_max - 1):
+                T_initial = calibrate(moves)
+                alpha = 0.001 ** (1 / max(1, k_max - 100))
+            continue
+
+        T = T_initial * alpha ** (k - 100)
+        if delta < 0 or rng.random() < math.exp(-delta / T):
+            perm[i], perm[j] = perm[j], perm[i]
+            f1, f2, c = new_f1, new_f2, c + delta
+            if not archive.dominates(f1, f2):
+                # Re-evaluate, so that rounding errors accumulated from the
+                # deltas do not create near-duplicate points
+                f1, f2 = problem.linear(perm), problem.quadratic(perm)
+                c = cost(f1, f2)
+                archive.add(f1, f2, perm)
+    return perm
+
+
+def pareto_anneal(k_max, problem, layout, weights=11, n=1, archive=None,
+                  rng=None):
+    """Solver: Multi-objective annealing over weighted sums
+    - Anneals `u * f1 + (1 - u) * f2` for `weights` values of u in [0, 1],
+      each for `k_max` steps, starting from the layout
+    - Every visited layout is added to the archive
+    """
+    rng = np.random.default_rng(rng)
+    if archive is None:
+        archive = ParetoArchive()
+    for u in np.linspace(0, 1, weights):
+        _anneal(k_max, problem, problem.encode(layout),
+                lambda f1, f2: u * f1 + (1 - u) * f2, n, archive, rng)
+    return archive
+
+
+def epsilon_constraint(k_max, problem, layout, epsilons, n=1, penalty=1000.0,
+                       archive=None, rng=None):
+    """Solver: Epsilon-constraint method
+    - For each epsilon, anneals f1 subject to f2 <= epsilon, where the
+      constraint violation is multiplied by `penalty` and added to f1
+    - Unlike weighted sums, this also finds points on the non-convex parts
+      of the front
+    - Every visited layout is added to the archive
+    """
+    rng = np.random.default_rng(rng)
+    if archive is None:
+        archive = ParetoArchive()
+    for epsilon in epsilons:
+        _anneal(k_max, problem, problem.encode(layout),
+                lambda f1, f2: f1 + penalty * max(0.0, f2 - epsilon), n,
+                archive, rng)
+    return archive
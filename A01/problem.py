@@ -0,0 +1,186 @@
+"""
+Compiled layout problem instances for the grid layout objectives.
+
+Element names are converted to integer ids once, and the position distances
+and element associations are stored as dense NumPy matrices. A layout is then
+represented as a permutation `perm` where `perm[i]` is the id of the element
+in position `i`, and it is evaluated with array gathers instead of Python
+loops and dictionary lookups.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+
+def distance_matrix(columns, positions):
+    """
+    Returns the Euclidean (unit) distances between all element positions in a
+    grid layout. Elementwise equal to `distance(columns, i, j)`.
+    """
+    p = np.arange(positions)
+    i, j = p[:, None], p[None, :]
+    return np.sqrt(np.abs(j / columns - i / columns) ** 2 +
+                   np.abs(i % columns - j % columns) ** 2)
+
+
+def association_matrix(elements, associations):
+    """
+    Returns a dense symmetric matrix of association scores between elements.
+    The score of a pair is looked up from the concatenated element names in
+    either order, like in `myObjective`.
+    """
+    n = len(elements)
+    a = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            e1, e2 = elements[i], elements[j]
+            a[i, j] = a[j, i] = \
+                associations.get(e1 + e2) or associations.get(e2 + e1) or 0
+    return a
+
+
+class NeighborIndex:
+    """
+    The positions within distance `radius` of each position in a grid
+    layout, stored contiguously: the neighbors of position i are
+    `indices[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, positions, columns, radius):
+        d = distance_matrix(columns, positions)
+        within = (d > 0) & (d <= radius)
+        self.counts = within.sum(axis=1)
+        if not self.counts.all():
+            raise ValueError(
+                "Position %i has no neighbors within distance %s" %
+                (np.argmin(self.counts), radius))
+        self.offsets = np.zeros(positions + 1, dtype=np.intp)
+        self.offsets[1:] = np.cumsum(self.counts)
+        self.indices = np.nonzero(within)[1]
+
+    def sample(self, i, u):
+        """Returns the neighbor of position i selected by u in [0, 1)."""
+        return self.indices[self.offsets[i] + int(u * self.counts[i])]
+
+    def sample_moves(self, size, rng):
+        """
+        Returns `size` random moves as arrays of positions i and j, where i
+        is uniform over all positions and j over the neighbors of i.
+        """
+        i = rng.integers(0, len(self.counts), size=size)
+        u = rng.random(size)
+        j = self.indices[self.offsets[i] + (u * self.counts[i]).astype(np.intp)]
+        return i, j
+
+
+@lru_cache(maxsize=None)
+def neighbor_index(positions, columns, radius):
+    """Returns the (cached) neighbor index of a grid layout."""
+    return NeighborIndex(positions, columns, radius)
+
+
+class LayoutProblem:
+    """
+    A compiled instance of the two-objective layout problem:
+    - linear: selection time, sum of element weights times the distance
+      from the first position, times the reading cost (`linear_ST`, `f1`)
+    - quadratic: sum of the distances between associated elements times
+      their association score (`myObjective`, `f2`)
+    - the cost of a layout is `u1 * linear + u2 * quadratic`
+    """
+
+    def __init__(self, elements, columns, weights, associations,
+                 u1=1.0, u2=1.0, reading_cost=1.0):
+        self.elements = list(elements)
+        self.columns = columns
+        self.n = len(self.elements)
+        self.ids = {e: i for i, e in enumerate(self.elements)}
+        assert len(self.ids) == self.n, "Elements must be unique"
+        self.u1 = u1
+        self.u2 = u2
+
+        # Elements without a weight do not contribute to selection time.
+        self.weights = np.array([weights.get(e, 0.0) for e in self.elements],
+                                dtype=float)
+        self.distance = distance_matrix(columns, self.n)
+        self.position_cost = reading_cost * self.distance[0]
+        # Position pairs i < j and their distances
+        self.pairs = np.triu_indices(self.n, 1)
+        self.pairs_distance = self.distance[self.pairs]
+        self.association = association_matrix(self.elements, associations)
+
+    def encode(self, layout):
+        """Converts a layout (list of element names) into a permutation."""
+        return np.array([self.ids[e] for e in layout], dtype=np.intp)
+
+    def decode(self, perm):
+        """Converts a permutation into a layout (list of element names)."""
+        return [self.elements[i] for i in perm]
+
+    def linear(self, perm):
+        return self.weights[perm] @ self.position_cost
+
+    def quadratic(self, perm):
+        p, q = self.pairs
+        return self.association[perm[p], perm[q]] @ self.pairs_distance
+
+    def evaluate(self, perm):
+        return self.u1 * self.linear(perm) + self.u2 * self.quadratic(perm)
+
+    def linear_batch(self, perms):
+        return self.weights[perms] @ self.position_cost
+
+    def quadratic_batch(self, perms):
+        p, q = self.pairs
+        return self.association[perms[:, p], perms[:, q]] @ \
+               self.pairs_distance
+
+    def evaluate_batch(self, perms):
+        """Returns the costs of each permutation in a (B, n) array."""
+        return self.u1 * self.linear_batch(perms) + \
+               self.u2 * self.quadratic_batch(perms)
+
+    def linear_swap_delta(self, perm, i, j):
+        a, b = perm[i], perm[j]
+        return (self.weights[b] - self.weights[a]) * \
+               (self.position_cost[i] - self.position_cost[j])
+
+    def quadratic_swap_delta(self, perm, i, j):
+        # Only the pairs involving positions i or j change. The pair (i, j)
+        # itself is unchanged, which the last term corrects for.
+        a, b = perm[i], perm[j]
+        return (self.distance[i] - self.distance[j]) @ \
+               (self.association[b, perm] - self.association[a, perm]) + \
+               2 * self.distance[i, j] * self.association[a, b]
+
+    def swap_delta(self, perm, i, j):
+        """
+        Returns the change in cost from swapping the elements in positions i
+        and j. Only the association rows of the two moved elements are used,
+        so this is O(n) instead of the O(n^2) of evaluating the new layout.
+        """
+        return self.u1 * self.linear_swap_delta(perm, i, j) + \
+               self.u2 * self.quadratic_swap_delta(perm, i, j)
+
+    def swap_delta_batch(self, perms, i, j):
+        """
+        Returns the changes in cost from swapping the elements in positions
+        `i[r]` and `j[r]` of each permutation `perms[r]` in a (B, n) array.
+        """
+        rows = np.arange(len(perms))
+        a, b = perms[rows, i], perms[rows, j]
+        d_linear = (self.weights[b] - self.weights[a]) * \
+                   (self.position_cost[i] - self.position_cost[j])
+        d_quadratic = np.sum(
+            (self.distance[i] - self.distance[j]) *
+            (self.association[b[:, None], perms] -
+             self.association[a[:, None], perms]), axis=1) + \
+            2 * self.distance[i, j] * self.association[a, b]
+        return self.u1 * d_linear + self.u2 * d_quadratic
+
+    def __call__(self, layout, columns=None, o_inputs=None):
+        """
+        Evaluates a layout using the objective function signature of the
+        solvers, so a compiled problem can be passed in place of `obj_f`.
+        """
+        return self.evaluate(self.encode(layout))
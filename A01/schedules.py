@@ -0,0 +1,105 @@
+"""
+Cooling schedules for simulated annealing.
+
+A solver calls `start(T_initial)` before the first step, `temperature(k)`
+before step k and `update(accepted)` after it. A schedule created without
+`T_initial` is started from a temperature calibrated with `calibrate` from
+a short probing run.
+"""
+import math
+
+
+def calibrate(deltas, acceptance=0.8):
+    """
+    Returns the temperature at which the average uphill move of the sampled
+    objective value changes is accepted with the given probability.
+    """
+    uphill = [delta for delta in deltas if delta > 0]
+    if not uphill:
+        return 1.0
+    return sum(uphill) / len(uphill) / -math.log(acceptance)
+
+
+class Schedule:
+    def __init__(self, T_initial=None):
+        self.T_initial = T_initial
+        self.start(T_initial)
+
+    def start(self, T_initial):
+        self.T = T_initial
+
+    def temperature(self, k):
+        raise NotImplementedError
+
+    def update(self, accepted):
+        pass
+
+
+class Exponential(Schedule):
+    """T = max(T_min, T_initial * alpha^k)"""
+
+    def __init__(self, T_initial=None, alpha=0.991, T_min=0.0000001):
+        super().__init__(T_initial)
+        self.alpha = alpha
+        self.T_min = T_min
+
+    def temperature(self, k):
+        return max(self.T_min, self.T * math.pow(self.alpha, k))
+
+
+class Logarithmic(Schedule):
+    """T = T_initial * log(2) / log(k + 2)"""
+
+    def temperature(self, k):
+        return self.T * math.log(2) / math.log(k + 2)
+
+
+class LundyMees(Schedule):
+    """
+    T_{k+1} = T_k / (1 + beta' * T_k), that is, T = T_initial / (1 + beta * k)
+    where `beta = beta' * T_initial` is relative to the initial temperature
+    """
+
+    def __init__(self, T_initial=None, beta=0.01):
+        super().__init__(T_initial)
+        self.beta = beta
+
+    def temperature(self, k):
+        return self.T / (1 + self.beta * k)
+
+
+class Adaptive(Schedule):
+    """
+    Adjusts the temperature to a target acceptance rate.
+    - The target starts from `target` and decays by `decay` every step
+    - After every `window` steps, the temperature is divided by `factor` if
+      the acceptance rate of the window was above the target, and
+      multiplied by it otherwise
+    """
+
+    def __init__(self, T_initial=None, target=0.5, decay=0.999, window=50,
+                 factor=1.2):
+        super().__init__(T_initial)
+        self.target = target
+        self.decay = decay
+        self.window = window
+        self.factor = factor
+
+    def start(self, T_initial):
+        self.T = T_initial
+        self.steps = 0
+        self.accepted = 0
+
+    def temperature(self, k):
+        return self.T
+
+    def update(self, accepted):
+        self.steps += 1
+        self.accepted += accepted
+        if self.steps % self.window == 0:
+            target = self.target * math.pow(self.decay, self.steps)
+            if self.accepted / self.window > target:
+                self.T /= self.factor
+            else:
+                self.T *= self.factor
+            self.accepted = 0
@@ -0,0 +1,186 @@
+"""
+A long-lived layout scoring service.
+
+Problem instances are compiled once (see `problem.LayoutProblem`) and kept
+by name, and requests score batches of layouts with the vectorized objective
+or run optimization jobs with the solvers. Requests and responses are JSON
+objects, read either one per line from stdin (responses one per line to
+stdout), or as the body of HTTP POST requests (a request or a list of
+requests).
+
+Requests:
+- {"op": "define", "problem": name, "elements": [...], "columns": c,
+  "weights": {...}, "associations": {...}, "u1": 1, "u2": 1,
+  "reading_cost": 1}
+- {"op": "score", "problem": name, "layouts": [[element, ...], ...]}, or
+  "perms" with element ids instead of "layouts"
+- {"op": "optimize", "problem": name, "layout": [...], "iters": k,
+  "solver": "anneal_swap", "seed": s, "options": {...}}
+- {"op": "problems"}
+An "id" in a request is copied to its response, and a failed request gets a
+response with an "error".
+
+Usage: python service.py [--http PORT]
+"""
+import argparse
+import json
+import socketserver
+import sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import numpy as np
+
+try:
+    from . import solvers
+    from .problem import LayoutProblem
+except ImportError:
+    import solvers
+    from problem import LayoutProblem
+
+SOLVERS = {
+    'anneal_swap': solvers.anneal_swap,
+    'parallel_tempering': solvers.parallel_tempering,
+    'random_search': solvers.random_search,
+}
+
+
+class Service:
+    def __init__(self, problems=None):
+        self.problems = dict(problems or {})
+
+    def define(self, request):
+        self.problems[request['problem']] = LayoutProblem(
+            request['elements'], request['columns'], request['weights'],
+            request.get('associations', {}), u1=request.get('u1', 1.0),
+            u2=request.get('u2', 1.0),
+            reading_cost=request.get('reading_cost', 1.0))
+        return {'n': len(request['elements'])}
+
+    def score(self, request):
+        problem = self.problems[request['problem']]
+        if 'perms' in request:
+            rows = request['perms']
+        else:
+            ids = problem.ids
+            rows = [[ids[e] for e in layout] for layout in request['layouts']]
+        if any(len(row) != problem.n for row in rows):
+            raise ValueError("Layouts must have %d elements" % problem.n)
+        if not all(isinstance(i, int) and not isinstance(i, bool)
+                   for row in rows for i in row):
+            raise ValueError("Layouts must be permutations of the elements")
+        perms = np.array(rows, dtype=np.intp).reshape(len(rows), problem.n)
+        if not (np.sort(perms, axis=1) == np.arange(problem.n)).all():
+            raise ValueError("Layouts must be permutations of the elements")
+        linear = problem.linear_batch(perms)
+        quadratic = problem.quadratic_batch(perms)
+        return {'scores': (problem.u1 * linear +
+                           problem.u2 * quadratic).tolist(),
+                'linear': linear.tolist(), 'quadratic': quadratic.tolist()}
+
+    def optimize(self, request):
+        problem = self.problems[request['problem']]
+        solver = SOLVERS[request.get('solver', 'anneal_swap')]
+        layout = request.get('layout', problem.elements)
+        layout, score = solver(request['iters'], problem, layout,
+                               rng=request.get('seed'),
+                               **request.get('options', {}))
+        return {'layout': layout, 'score': score}
+
+    def handle(self, request):
+        """Returns the response to a request."""
+        response = {}
+        if not isinstance(request, dict):
+            response['error'] = "TypeError: A request must be a JSON object"
+            return response
+        if 'id' in request:
+            response['id'] = request['id']
+        try:
+            op = request.get('op', 'score')
+            if op == 'define':
+                response.update(self.define(request))
+            elif op == 'score':
+                response.update(self.score(request))
+            elif op == 'optimize':
+                response.update(self.optimize(request))
+            elif op == 'problems':
+                response['problems'] = {
+                    name: problem.elements
+                    for name, problem in self.problems.items()}
+            else:
+                raise ValueError("Unknown op %r" % op)
+        except Exception as e:
+            response['error'] = "%s: %s" % (type(e).__name__, e)
+        return response
+
+    def serve_lines(self, lines=sys.stdin, out=sys.stdout):
+        """Answers the requests read one per line."""
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                response = self.handle(json.loads(line))
+            except json.JSONDecodeError as e:
+                response = {'error': "JSONDecodeError: %s" % e}
+            out.write(json.dumps(response) + '\n')
+            out.flush()
+
+    def serve_http(self, port, host='127.0.0.1'):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                try:
+                    body = json.loads(self.rfile.read(length))
+                except (json.JSONDecodeError, UnicodeDecodeError) as e:
+                    self.reply(400, {'error': "%s: %s" % (type(e).__name__, e)})
+                    return
+                if isinstance(body, list):
+                    self.reply(200, [service.handle(r) for r in body])
+                else:
+                    self.reply(200, service.handle(body))
+
+            def do_GET(self):
+                self.reply(200, service.handle({'op': 'problems'}))
+
+            def reply(self, status, response):
+                data = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, HTTPServer):
+            daemon_threads = True
+
+        server = Server((host, port), Handler)
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--http', type=int, metavar='PORT',
+                        help="serve HTTP on this port instead of stdin")
+    args = parser.parse_args()
+
+    # The menu instance of the assignment is available as "menu"
+    try:
+        from .tollander_A_1_2 import problem
+    except ImportError:
+        from tollander_A_1_2 import problem
+    service = Service({'menu': problem})
+    if args.http is not None:
+        service.serve_http(args.http)
+    else:
+        service.serve_lines()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Solvers for compiled layout problems (see `problem.LayoutProblem`).
+
+The solvers follow the same calling convention as the solvers in the
+assignment scripts, `solver(iters, *args)`, so they can be passed to
+`optimize`, and return a `(layout, score)` pair.
+"""
+import math
+from functools import partial
+from multiprocessing import Pool
+
+import numpy as np
+
+try:
+    from .problem import neighbor_index
+    from .schedules import Exponential, calibrate
+except ImportError:
+    from problem import neighbor_index
+    from schedules import Exponential, calibrate
+
+
+def initial_temperature(problem, layout, n=1, acceptance=0.8, samples=200,
+                        rng=None):
+    """
+    Returns the temperature at which an average uphill move is accepted with
+    the given probability, estimated from a random walk of swap moves
+    starting from the layout.
+    """
+    rng = np.random.default_rng(rng)
+    s = problem.encode(layout)
+    deltas = []
+    for i, j in zip(*neighbor_index(problem.n, problem.columns, n)
+                    .sample_moves(samples, rng)):
+        deltas.append(problem.swap_delta(s, i, j))
+        s[i], s[j] = s[j], s[i]
+    return float(calibrate(deltas, acceptance))
+
+
+def anneal_swap(k_max, problem, layout, n=1, schedule=None, patience=None,
+                trace=None, rng=None):
+    """Solver: Simulated annealing
+    - Same moves, schedules, early stopping and tracing as `anneal`; a
+      schedule without T_initial is calibrated with `initial_temperature`
+    - Swap moves are scored incrementally with `problem.swap_delta`
+    - The layout is only modified when a move is accepted
+    """
+    rng = np.random.default_rng(rng)
+    s = problem.encode(layout)
+    s_ov = problem.evaluate(s)
+    if schedule is None:
+        schedule = Exponential(10000, 0.991, 0.0000001)  # Hyperparameters
+    T_initial = schedule.T_initial
+    if T_initial is None:
+        T_initial = initial_temperature(problem, layout, n, rng=rng)
+    schedule.start(T_initial)
+    best_ov, best_k = s_ov, 0
+
+    # Draw the moves and random numbers for all steps at once
+    positions, neighbors = neighbor_index(
+        problem.n, problem.columns, n).sample_moves(k_max, rng)
+    metropolis = rng.random(k_max)
+
+    for k in range(0, k_max):
+        T = schedule.temperature(k)
+        i, j = positions[k], neighbors[k]
+
+        delta = problem.swap_delta(s, i, j)
+        # accept the neighbor if it is better, and if not, decide according
+        # to the Metropolis rule
+        accepted = delta < 0 or metropolis[k] < math.exp(-delta / T)
+        if accepted:
+            s[i], s[j] = s[j], s[i]
+            s_ov += delta
+        schedule.update(accepted)
+
+        if s_ov < best_ov:
+            best_ov, best_k = s_ov, k
+        if trace is not None:
+            trace.record(k, k + 2, best_ov, s_ov, T, accepted)
+        if patience is not None and k - best_k >= patience:
+            break
+    # Re-evaluate to avoid accumulating rounding errors from the deltas
+    return problem.decode(s), float(problem.evaluate(s))
+
+
+def parallel_tempering(k_max, problem, layout, n=1, replicas=8, T_min=None,
+                       T_max=None, swap_interval=10, trace=None, rng=None):
+    """Solver: Parallel tempering (replica exchange)
+    - Runs `replicas` annealing chains in lockstep at fixed temperatures on a
+      geometric ladder from T_min to T_max; each step moves every chain once
+    - Every `swap_interval` steps, chains at adjacent temperatures exchange
+      their states according to the Metropolis rule
+    - By default the ladder is calibrated from a random walk, so that an
+      average uphill move is accepted with probability 0.8 in the hottest
+      chain and 0.001 in the coldest chain
+    - The coldest chain is recorded to `trace`, if given
+    """
+    rng = np.random.default_rng(rng)
+    if T_max is None:
+        T_max = initial_temperature(problem, layout, n, 0.8, rng=rng)
+    if T_min is None:
+        T_min = T_max * math.log(0.8) / math.log(0.001)
+    T = np.geomspace(T_min, T_max, replicas)
+
+    index = neighbor_index(problem.n, problem.columns, n)
+    rows = np.arange(replicas)
+    s = np.tile(problem.encode(layout), (replicas, 1))
+    s_ov = np.full(replicas, problem.evaluate(s[0]))
+    best, best_ov = s[0].copy(), s_ov[0]
+
+    for k in range(0, k_max):
+        # Propose one swap move in every chain
+        i, j = index.sample_moves(replicas, rng)
+        delta = problem.swap_delta_batch(s, i, j)
+        accept = rng.random(replicas) < np.exp(-np.maximum(delta, 0) / T)
+        r = rows[accept]
+        s[r, i[accept]], s[r, j[accept]] = s[r, j[accept]], s[r, i[accept]]
+        s_ov[accept] += delta[accept]
+
+        r = np.argmin(s_ov)
+        if s_ov[r] < best_ov:
+            best, best_ov = s[r].copy(), s_ov[r]
+        if trace is not None:
+            trace.record(k, (k + 1) * replicas + 1, best_ov, s_ov[0], T[0],
+                         accept[0])
+
+        if (k + 1) % swap_interval == 0:
+            # Exchange between adjacent pairs of chains, alternating between
+            # even and odd pairs
+            t = np.arange((k // swap_interval) % 2, replicas - 1, 2)
+            log_ratio = (s_ov[t] - s_ov[t + 1]) * (1 / T[t] - 1 / T[t + 1])
+            t = t[np.log(rng.random(len(t))) < log_ratio]
+            s[t], s[t + 1] = s[t + 1], s[t]
+            s_ov[t], s_ov[t + 1] = s_ov[t + 1], s_ov[t]
+    return problem.decode(best), float(problem.evaluate(best))
+
+
+def random_search(max_iters, problem, layout, batch_size=None, trace=None,
+                  rng=None):
+    """Solver: Random search method
+    - Same as `random_search` in the assignment scripts, for compiled problems
+    - Random layouts are generated and scored in batches of `batch_size`
+      (by default, as many as fit in about 8 MB of pair scores)
+    - The best candidate of each batch is recorded to `trace`, if given
+    """
+    rng = np.random.default_rng(rng)
+    if batch_size is None:
+        batch_size = max(1, 2 ** 20 // max(1, len(problem.pairs_distance)))
+    incumbent = problem.encode(layout)
+    incumbent_ov = problem.evaluate(incumbent)
+    for start in range(0, max_iters, batch_size):
+        size = min(batch_size, max_iters - start)
+        # Sorting random keys gives uniformly random permutations
+        candidates = np.argsort(rng.random((size, problem.n)), axis=1)
+        candidates_ov = problem.evaluate_batch(candidates)
+        best = np.argmin(candidates_ov)
+        # Update best known if an improvement was found
+        improved = candidates_ov[best] < incumbent_ov
+        if improved:
+            incumbent = candidates[best]
+            incumbent_ov = candidates_ov[best]
+        if trace is not None:
+            trace.record(start + size, start + size + 1, incumbent_ov,
+                         candidates_ov[best], accepted=improved)
+    return problem.decode(incumbent), float(incumbent_ov)
+
+
+# The problem instance of a worker process, set once by `_init_worker`.
+_worker_problem = None
+
+
+def _init_worker(problem):
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _run_worker(solver, iters, args, seed):
+    return solver(iters, _worker_problem, *args, rng=seed)
+
+
+def optimize_many(iters, solver, problem, *args, restarts=10, seed=None,
+                  workers=None):
+    """Our parallel optimization service:
+    - Runs independent restarts of `solver(iters, problem, *args, rng=...)`
+      in a pool of `workers` processes (default: number of CPUs)
+    - The problem is sent to each worker once, not with every restart
+    - Each restart gets its own seed derived from `seed`, so the results do
+      not depend on the number of workers or the order of execution
+    - Returns the best layout, its score and the scores of all restarts
+    """
+    seeds = np.random.SeedSequence(seed).spawn(restarts)
+    with Pool(workers, initializer=_init_worker, initargs=(problem,)) as pool:
+        results = pool.map(partial(_run_worker, solver, iters, args), seeds,
+                           chunksize=1)
+    scores = np.array([score for _, score in results])
+    best = int(np.argmin(scores))
+    return results[best][0], float(scores[best]), scores
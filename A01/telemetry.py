@@ -0,0 +1,79 @@
+"""
+Telemetry for the solvers: convergence traces, evaluation counters and
+timings.
+"""
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+EVENT = np.dtype([('step', np.int64), ('evaluations', np.int64),
+                  ('best', np.float64), ('current', np.float64),
+                  ('temperature', np.float64), ('accepted', np.bool_),
+                  ('time', np.float64)])
+
+
+class Trace:
+    """
+    A ring buffer of solver events, recorded every `every` steps.
+    - A solver whose steps advance by more than one (e.g. a batch at a
+      time) is recorded at the first step that reaches each multiple of
+      `every`
+    - An event holds the step, the number of objective evaluations, the best
+      and current objective values, the temperature, whether the move of the
+      step was accepted, and the wall time since `start`
+    - When the buffer is full, the oldest events are overwritten
+    - `timer(name)` accumulates the wall time of a section into `timings`
+
+    Because the temperature of a step does not depend on the number of
+    steps, the current value of an annealing run at step k is distributed
+    like the result of a k-step run, and likewise the best value of a random
+    search. One long run thus shows the convergence for all shorter budgets.
+    """
+
+    def __init__(self, capacity=10000, every=1):
+        self.capacity = capacity
+        self.every = every
+        self.events = np.zeros(capacity, dtype=EVENT)
+        self.timings = dict()
+        self.start()
+
+    def start(self):
+        self.size = 0
+        self.next_step = 0
+        self.t0 = time.perf_counter()
+
+    def __len__(self):
+        return min(self.size, self.capacity)
+
+    def record(self, step, evaluations, best, current, temperature=np.nan,
+               accepted=True):
+        if step < self.next_step:
+            return
+        self.next_step = (step // self.every + 1) * self.every
+        self.events[self.size % self.capacity] = (
+            step, evaluations, best, current, temperature, accepted,
+            time.perf_counter() - self.t0)
+        self.size += 1
+
+    @contextmanager
+    def timer(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + \
+                                 time.perf_counter() - t0
+
+    def to_numpy(self):
+        """Returns the events in order as a structured array."""
+        if self.size <= self.capacity:
+            return self.events[:self.size].copy()
+        k = self.size % self.capacity
+        return np.concatenate((self.events[k:], self.events[:k]))
+
+    def to_csv(self, filename):
+        events = self.to_numpy()
+        np.savetxt(filename, events, delimiter=',',
+                   header=','.join(EVENT.names), comments='',
+                   fmt=['%d', '%d', '%.17g', '%.17g', '%.17g', '%d', '%.9f'])
@@ -2,6 +2,15 @@ import math
 import random
 from functools import partial
 
+import numpy as np
+
+try:
+    from .pareto import epsilon_constraint, pareto_anneal, pareto_random_search
+    from .problem import LayoutProblem
+except ImportError:
+    from pareto import epsilon_constraint, pareto_anneal, pareto_random_search
+    from problem import LayoutProblem
+
 
 def distance(columns, i, j):
     """
@@ -89,12 +98,11 @@ def objective(u1, u2, layout, columns, o_inputs):
 def pareto_optimal_design(u1, iterations):
     assert 0 <= u1 <= 1
     u2 = 1 - u1
-    args = [seed_layout,
-            columns,
-            partial(objective, u1, u2),
-            normalized(e_weights),
-            normalized(associations)]
-    winner, winner_score = random_search(iterations, *args)
+    # Compiled equivalent of partial(objective, u1, u2) with normalized inputs
+    problem = LayoutProblem(seed_layout, columns, normalized(e_weights),
+                            normalized(associations), u1, u2)
+    winner, winner_score = random_search(iterations, seed_layout, columns,
+                                         problem)
     return winner, winner_score
 
 
@@ -107,20 +115,23 @@ associations = {'WordExcel': 0.5, 'WordPPT': 0.5, 'MailCal': 0.3, 'CalPpl': 0.3,
                 'TasksCal': 0.2, 'NotesTasks': 0.3}
 columns = 6
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-sns.set()
-
-v1 = []
-v2 = []
-u1s = list(i / 20 for i in range(21))
-for u1 in u1s:
-    print(u1)
-    winner, winner_score = pareto_optimal_design(u1, 10000)
-    v1.append(f1(winner, columns, [e_weights]))
-    v2.append(f2(winner, columns, [associations]))
-
-plt.plot(v1, v2, lw=0, marker='*')
-plt.xlabel("$f_1(x)$")
-plt.ylabel("$f_2(x)$")
-plt.savefig("figures/pareto_frontier.png")
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    sns.set()
+
+    # Instead of one random search per weight u1, all the runs add every
+    # layout they evaluate to one archive of non-dominated (f1, f2) points.
+    problem = LayoutProblem(seed_layout, columns, e_weights, associations)
+    archive = pareto_random_search(210000, problem, seed_layout, rng=0)
+    pareto_anneal(10000, problem, seed_layout, 21, 2, archive, rng=1)
+    v2 = archive.front()[:, 1]
+    epsilon_constraint(10000, problem, seed_layout,
+                       np.linspace(v2.min(), v2.max(), 21), 2,
+                       archive=archive, rng=2)
+    v1, v2 = archive.front().T
+
+    plt.plot(v1, v2, lw=0, marker='*')
+    plt.xlabel("$f_1(x)$")
+    plt.ylabel("$f_2(x)$")
+    plt.savefig("figures/pareto_frontier.png")
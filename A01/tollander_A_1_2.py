@@ -1,5 +1,15 @@
 import math, random
-from collections import defaultdict
+
+try:
+    from . import solvers
+    from .memo import MemoizedObjective
+    from .problem import LayoutProblem, neighbor_index
+    from .schedules import Exponential, calibrate
+except ImportError:
+    import solvers
+    from memo import MemoizedObjective
+    from problem import LayoutProblem, neighbor_index
+    from schedules import Exponential, calibrate
 
 
 def distance(columns, i, j):
@@ -29,11 +39,12 @@ def linear_ST(layout, columns, o_inputs):
     return ST
 
 
-def random_search(max_iters, *args):
+def random_search(max_iters, *args, trace=None):
     """Our solver: Random search method
     - Shuffles a layout (list) and asks from objective function how good it is
     - Updates incumbent (best known design) whenever an improvement is found
     - Continues like this max_iters times
+    - Records the progress to `trace` (a `telemetry.Trace`), if given
     """
     columns = args[1]  # Number of columns in this layout (=1)
     obj_f = args[2]  # Handle to the objective function (=linear_ST)
@@ -48,18 +59,35 @@ def random_search(max_iters, *args):
         candidate_ov = obj_f(candidate, columns,
                              o_inputs)  # Then compute its objective value
 
-        if candidate_ov < incumbent_ov:  # Update best known if an improvement was found
+        improved = candidate_ov < incumbent_ov
+        if improved:  # Update best known if an improvement was found
             incumbent = candidate[:]
             incumbent_ov = candidate_ov
+        if trace is not None:
+            trace.record(iter, iter + 2, incumbent_ov, candidate_ov,
+                         accepted=improved)
     return incumbent, incumbent_ov
 
 
-def optimize(iters, solver, *args):
+def optimize(iters, solver, *args, memo=None, trace=None):
     """Our generic optimization service:
     - Solver and objective function are given as arguments
     - Used throughout the exercises
+    - If `memo` is given, the objective function is wrapped with a cache of
+      at most `memo` objective values, so layouts are not scored twice. This
+      pays off for solvers that revisit layouts, such as `anneal` with small
+      neighborhoods, but not for `random_search`, which almost never draws
+      the same permutation twice
+    - If `trace` (a `telemetry.Trace`) is given, the solver records its
+      progress to it, and the run time is added to its timings
     """
-    return solver(iters, *args)
+    if memo is not None:
+        args = args[:2] + (MemoizedObjective(args[2], memo),) + args[3:]
+    if trace is None:
+        return solver(iters, *args)
+    trace.start()
+    with trace.timer(solver.__name__):
+        return solver(iters, *args, trace=trace)
 
 
 def ST_and_myO(layout, columns, o_inputs):
@@ -87,7 +115,7 @@ def myObjective(layout, columns, o_inputs):
     return ov
 
 
-def neighbor(layout, n=1):
+def neighbor(layout, columns, n=1):
     """
     Returns a neighbor of a layout (list);
     has a parameter 'n' to control distance in the neighborhood (optional)
@@ -95,16 +123,9 @@ def neighbor(layout, n=1):
     # Choose a random element from layout
     i = random.randrange(0, len(layout))
 
-    # Filter all elements that have distance over n.
-    canditates = []
-    for j in range(len(layout)):
-        if i == j:
-            continue
-        if distance(columns, i, j) <= n:
-            canditates.append(j)
-
-    # Choose a random element from remaining elements
-    j = random.choice(canditates)
+    # Choose a random element from the elements within distance n, using the
+    # neighbor index that is built once per layout size, columns and n.
+    j = neighbor_index(len(layout), columns, n).sample(i, random.random())
 
     # Swap the elements i and j.
     new_layout = layout[:]
@@ -113,31 +134,54 @@ def neighbor(layout, n=1):
     return new_layout
 
 
-def anneal(k_max, *args):
-    """Solver: Simulated annealing using exponential cooling schedule"""
+def anneal(k_max, *args, schedule=None, patience=None, trace=None):
+    """Solver: Simulated annealing
+    - Uses the exponential cooling schedule with T_initial=10000, unless
+      another schedule from `schedules` is given
+    - A schedule without T_initial is calibrated from the objective values
+      of 100 neighbors of the seed
+    - If `patience` is given, stops when the objective value has not
+      improved in `patience` steps
+    - Records the progress to `trace` (a `telemetry.Trace`), if given
+    """
     s = args[0]  # solution seed
     columns = args[1]
     obj_f = args[2]
     o_inputs = args[3:]
     s_ov = obj_f(s, columns, o_inputs)
-    T_min, T_initial, alpha = 0.0000001, 10000, 0.991  # Hyperparameters
-    converged = False
+    evaluations = 1
+    if schedule is None:
+        schedule = Exponential(10000, 0.991, 0.0000001)  # Hyperparameters
+    T_initial = schedule.T_initial
+    if T_initial is None:
+        T_initial = calibrate(
+            [obj_f(neighbor(s, columns, args[-1]), columns, o_inputs) - s_ov
+             for _ in range(100)])
+        evaluations += 100
+    schedule.start(T_initial)
+    best_ov, best_k = s_ov, 0
 
     for k in range(0, k_max):
-        # exponential cooling schedule
-        T = max(T_min, T_initial * math.pow(alpha, k))
-        s_new = neighbor(s[:], args[-1])
+        T = schedule.temperature(k)
+        s_new = neighbor(s, columns, args[-1])
         s_new_ov = obj_f(s_new, columns, o_inputs)
+        evaluations += 1
 
         delta = s_new_ov - s_ov
-        if delta < 0:
-            # accept the neighbor if it is better
-            s = s_new[:]
-            s_ov = s_new_ov
-        elif random.random() < math.exp(-delta / T):
-            # if not, decide according to the Metropolis rule
+        # accept the neighbor if it is better, and if not, decide according
+        # to the Metropolis rule
+        accepted = delta < 0 or random.random() < math.exp(-delta / T)
+        if accepted:
             s = s_new[:]
             s_ov = s_new_ov
+        schedule.update(accepted)
+
+        if s_ov < best_ov:
+            best_ov, best_k = s_ov, k
+        if trace is not None:
+            trace.record(k, evaluations, best_ov, s_ov, T, accepted)
+        if patience is not None and k - best_k >= patience:
+            break
     return s, s_ov
 
 
@@ -150,36 +194,37 @@ e_weights = {'Tasks': 0.1, 'Word': 0.2, 'Excel': 0.15, 'PPT': 0.2,
 associations = {'WordExcel': 0.5, 'WordPPT': 0.5, 'MailCal': 0.3, 'PplCal': 0.3,
                 'TasksCal': 0.2, 'NotesTasks': 0.3}
 columns = 6
-
-import matplotlib.pyplot as plt
-import seaborn as sns
-
-sns.set()
-for n in [1, 2, 3, 4]:
-    # Optimization
-    r = [2000, 4000, 6000, 8000, 10000]
-    trials = 10
-    d_anneal = defaultdict(list)
-    d_random = defaultdict(list)
-    for iterations in r:
-        for _ in range(trials):
-            winner, winner_score = optimize(
-                iterations, anneal, seed_layout, columns, ST_and_myO, e_weights,
-                associations, n)
-            d_anneal[iterations].append(winner_score)
-
-            winner, winner_score = optimize(
-                iterations, random_search, seed_layout, columns, ST_and_myO, e_weights,
-                associations)
-            d_random[iterations].append(winner_score)
-
-    fig, ax = plt.subplots()
-    for key, values in d_anneal.items():
-        plt.scatter([key for _ in range(len(values))], values, color='b', alpha=0.7)
-    for key, values in d_random.items():
-        plt.scatter([key for _ in range(len(values))], values, color='y', alpha=0.7)
-
-    # plt.legend()
-    plt.xlabel("Iterations")
-    plt.ylabel("$f(x)$")
-    plt.savefig(f"figures/annealing_vs_random_search_n{n}.png")
+# Compiled equivalent of ST_and_myO for the task instance
+problem = LayoutProblem(seed_layout, columns, e_weights, associations,
+                        u2=0.5, reading_cost=0.4)
+
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set()
+    for n in [1, 2, 3, 4]:
+        # Optimization
+        r = [2000, 4000, 6000, 8000, 10000]
+        trials = 10
+        d_anneal = dict()
+        d_random = dict()
+        for iterations in r:
+            # The trials are run in parallel, seeded for reproducibility
+            _, _, d_anneal[iterations] = solvers.optimize_many(
+                iterations, solvers.anneal_swap, problem, seed_layout, n,
+                restarts=trials, seed=[n, iterations])
+            _, _, d_random[iterations] = solvers.optimize_many(
+                iterations, solvers.random_search, problem, seed_layout,
+                restarts=trials, seed=[n, iterations])
+
+        fig, ax = plt.subplots()
+        for key, values in d_anneal.items():
+            plt.scatter([key for _ in range(len(values))], values, color='b', alpha=0.7)
+        for key, values in d_random.items():
+            plt.scatter([key for _ in range(len(values))], values, color='y', alpha=0.7)
+
+        # plt.legend()
+        plt.xlabel("Iterations")
+        plt.ylabel("$f(x)$")
+        plt.savefig(f"figures/annealing_vs_random_search_n{n}.png")
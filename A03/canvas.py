@@ -388,7 +388,8 @@ class MainWindow(ttk.Frame):
         canvas.grid(row=0, column=0)  # show widget
 
 
-filename = 'telescope.jpg'  # place path to your image here
+if __name__ == "__main__":
+    filename = 'telescope.jpg'  # place path to your image here
 
-app = MainWindow(tk.Tk(), path=filename)
-app.mainloop()
+    app = MainWindow(tk.Tk(), path=filename)
+    app.mainloop()
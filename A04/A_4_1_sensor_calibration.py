@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt
 import numpy as np
 from scipy.interpolate import interp1d
 from scipy.stats.mstats_basic import linregress
@@ -19,18 +18,21 @@ key_coarse = np.array([2325, 2232, 2081, 1779, 1129])
 calibrate = interp1d(disp_coarse, key_coarse)
 slope, intercept, rvalue, pvalue, stderr = linregress(disp_coarse, key_coarse)
 
-# The figures
-# import seaborn; seaborn.set()  # Prettier plots
-plt.grid()
-plt.plot(disp_fine, key_fine, "-", label="Fine")
-plt.plot(disp_coarse, key_coarse, "X", label="Coarse")
-plt.plot([disp_coarse[0], disp_coarse[-1]],
-         [key_coarse[0], key_coarse[-1]], "--", label="Start-End")
-plt.plot(disp_fine, calibrate(disp_fine), label="interp1d")
-plt.plot(disp_fine, intercept + slope * disp_fine,
-         label=f"linregress:\n{intercept}+({slope})x")
-plt.xlabel('Key displacement in mm')
-plt.ylabel('raw sensor value')
-plt.legend()
-# plt.savefig("figures/calibration.png", dpi=300)
-plt.show()
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # The figures
+    # import seaborn; seaborn.set()  # Prettier plots
+    plt.grid()
+    plt.plot(disp_fine, key_fine, "-", label="Fine")
+    plt.plot(disp_coarse, key_coarse, "X", label="Coarse")
+    plt.plot([disp_coarse[0], disp_coarse[-1]],
+             [key_coarse[0], key_coarse[-1]], "--", label="Start-End")
+    plt.plot(disp_fine, calibrate(disp_fine), label="interp1d")
+    plt.plot(disp_fine, intercept + slope * disp_fine,
+             label=f"linregress:\n{intercept}+({slope})x")
+    plt.xlabel('Key displacement in mm')
+    plt.ylabel('raw sensor value')
+    plt.legend()
+    # plt.savefig("figures/calibration.png", dpi=300)
+    plt.show()
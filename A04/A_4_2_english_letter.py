@@ -1,5 +1,7 @@
 import math
-from typing import Dict, List, Iterable
+from typing import Dict, List, Iterable, Optional
+
+import numpy as np
 
 letter_distribution = [
     ['a', 0.08167], ['b', 0.01492], ['c', 0.02782], ['d', 0.04253],
@@ -27,18 +29,184 @@ def entropy(probabilities: Iterable):
     return -sum((p * math.log2(p)) for p in probabilities)
 
 
-def optimized_multi_tap_layout(keys: List, distribution: List):
+def optimized_multi_tap_layout(keys: List, distribution: List,
+                               capacity: Optional[int] = None):
     # Sort the disribution by probability, in decreasing order.
     distribution_sorted = sorted(distribution, key=lambda x: x[1], reverse=True)
     score = 0  # Expected number of keypresses
     layout = {k: [] for k in keys}
-    for (i, (l, p)) in enumerate(distribution_sorted):
-        d, m = divmod(i, len(keys))
-        layout[keys[m]].append(l)
+    if capacity is None:
+        capacity = len(distribution)
+    # The slots sorted by the number of presses; full keys are skipped.
+    slots = [(d, k) for d in range(capacity) for k in keys]
+    assert len(slots) >= len(distribution), "not enough room on the keys"
+    for ((d, k), (l, p)) in zip(slots, distribution_sorted):
+        layout[k].append(l)
         score += p * (d+1)
     return layout, score
 
 
+def ordered_multi_tap_layouts(keys: List, letters: List, probabilities,
+                              capacity: Optional[int] = None):
+    """
+    Optimal multi-tap layouts that keep the letters in order, that is, each
+    key gets a contiguous group of `letters`, by dynamic programming.
+    - probabilities: (distributions, letters) array; all distributions are
+      solved at once
+    - cost[k, j] is the least expected number of key presses of the first j
+      letters on the first k keys, and the cost of a group of letters i..j-1
+      on one key is computed from prefix sums in O(1), so the DP takes
+      O(k n^2) steps
+    - capacity: maximum number of letters per key
+    Returns the layouts and the array of their expected numbers of presses.
+    """
+    P = np.atleast_2d(np.asarray(probabilities, dtype=float))
+    m, n = P.shape
+    if capacity is None:
+        capacity = n
+    assert len(keys) * capacity >= n, "not enough room on the keys"
+    # S[:, j] = sum of p_t and T[:, j] = sum of t * p_t over t < j
+    S = np.zeros((m, n + 1))
+    T = np.zeros((m, n + 1))
+    S[:, 1:] = np.cumsum(P, axis=1)
+    T[:, 1:] = np.cumsum(P * np.arange(n), axis=1)
+
+    cost = np.full((m, n + 1), np.inf)
+    cost[:, 0] = 0
+    split = np.zeros((len(keys), m, n + 1), dtype=np.intp)
+    rows = np.arange(m)
+    for k in range(len(keys)):
+        new_cost = np.full((m, n + 1), np.inf)
+        for j in range(n + 1):
+            i = np.arange(max(0, j - capacity), j + 1)
+            # Letter t of the group i..j-1 takes t - i + 1 presses
+            group = (T[:, j, None] - T[:, i]) - \
+                    (i - 1) * (S[:, j, None] - S[:, i])
+            total = cost[:, i] + group
+            best = np.argmin(total, axis=1)
+            new_cost[:, j] = total[rows, best]
+            split[k, :, j] = i[best]
+        cost = new_cost
+
+    layouts = []
+    for r in range(m):
+        layout = {}
+        j = n
+        for k in range(len(keys) - 1, -1, -1):
+            i = split[k, r, j]
+            layout[keys[k]] = list(letters[i:j])
+            j = i
+        layouts.append({k: layout[k] for k in keys})
+    return layouts, cost[:, n]
+
+
+def ordered_multi_tap_layout(keys: List, distribution: List,
+                             capacity: Optional[int] = None):
+    letters = [l for (l, p) in distribution]
+    layouts, scores = ordered_multi_tap_layouts(
+        keys, letters, [[p for (l, p) in distribution]], capacity)
+    return layouts[0], float(scores[0])
+
+
+def bigram_multi_tap_layout(keys: List, letters: List, probabilities,
+                            bigrams, timeout: float = 1.0,
+                            capacity: Optional[int] = None, restarts: int = 0,
+                            rng=None):
+    """
+    Multi-tap layout for the expected number of key presses per letter,
+    where a letter that follows a letter on the same key costs `timeout`
+    additional presses (waiting or pressing a next key).
+    - bigrams: (letters, letters) array of bigram probabilities
+    - Steepest descent over swaps of letters between slots (key, depth),
+      starting from the round-robin layout and then `restarts` random
+      layouts. Empty slots are dummy letters with zero probability.
+    - The same-key bigram mass M[l, k] of each letter l with the letters on
+      each key k is kept up to date, so that the cost changes of all swaps
+      are computed at once in O(n^2), and a swap updates M in O(n)
+    Returns the layout and its expected number of presses.
+    """
+    rng = np.random.default_rng(rng)
+    n = len(letters)
+    if capacity is None:
+        capacity = n
+    slots = len(keys) * capacity
+    assert slots >= n, "not enough room on the keys"
+    p = np.zeros(slots)
+    p[:n] = probabilities
+    # Symmetric bigram mass of unordered pairs; repeats are on the same key
+    # in any layout and add a constant.
+    S = np.zeros((slots, slots))
+    S[:n, :n] = np.asarray(bigrams) + np.asarray(bigrams).T
+    np.fill_diagonal(S, 0)
+
+    def descend(order):
+        # order[s] is the letter in slot s = depth * len(keys) + key
+        key = np.empty(slots, dtype=np.intp)
+        depth = np.empty(slots)
+        key[order] = np.arange(slots) % len(keys)
+        depth[order] = np.arange(slots) // len(keys) + 1
+        M = np.zeros((slots, len(keys)))
+        np.add.at(M.T, key, S)
+        while True:
+            MK = M[:, key]
+            m = MK[np.arange(slots), np.arange(slots)]
+            delta = (p[:, None] - p[None, :]) * (depth[None, :] -
+                                                 depth[:, None])
+            bigram = MK + MK.T - m[:, None] - m[None, :] - 2 * S
+            bigram[key[:, None] == key[None, :]] = 0
+            delta += timeout * bigram
+            a, b = np.unravel_index(np.argmin(delta), delta.shape)
+            if delta[a, b] >= -1e-12:
+                break
+            ka, kb = key[a], key[b]
+            M[:, ka] += S[:, b] - S[:, a]
+            M[:, kb] += S[:, a] - S[:, b]
+            key[a], key[b] = kb, ka
+            depth[a], depth[b] = depth[b], depth[a]
+        return key, depth
+
+    def score(key, depth):
+        same = key[:, None] == key[None, :]
+        return p @ depth + timeout * np.triu(S * same).sum()
+
+    starts = [np.argsort(-p, kind="stable")]
+    starts += [rng.permutation(slots) for _ in range(restarts)]
+    key, depth = min((descend(order) for order in starts),
+                     key=lambda r: score(*r))
+
+    # Remove the gaps left by empty slots, which can only lower the cost.
+    layout = {k: [] for k in keys}
+    for l in sorted(range(n), key=lambda l: depth[l]):
+        layout[keys[key[l]]].append(letters[l])
+    return layout, bigram_keypresses(layout, letters, probabilities, bigrams,
+                                     timeout)
+
+
+def bigram_keypresses(layout: Dict, letters: List, probabilities, bigrams,
+                      timeout: float = 1.0):
+    """The cost of `bigram_multi_tap_layout` for a layout."""
+    index = {l: i for i, l in enumerate(letters)}
+    key = np.empty(len(letters), dtype=np.intp)
+    depth = np.empty(len(letters))
+    for k, group in enumerate(layout.values()):
+        for (d, l) in enumerate(group):
+            key[index[l]] = k
+            depth[index[l]] = d + 1
+    same = key[:, None] == key[None, :]
+    return float(np.asarray(probabilities) @ depth +
+                 timeout * (np.asarray(bigrams) * same).sum())
+
+
+def bigram_multi_tap_layouts(keys: List, letters: List, probabilities,
+                             bigrams, **kwargs):
+    """Solves `bigram_multi_tap_layout` for each row of `probabilities`
+    and matrix of `bigrams`."""
+    results = [bigram_multi_tap_layout(keys, letters, p, b, **kwargs)
+               for p, b in zip(probabilities, bigrams)]
+    return [layout for layout, _ in results], \
+           np.array([score for _, score in results])
+
+
 def expected_number_of_keypresses(layout: Dict, distribution: List):
     d = dict(distribution)
     score = 0
@@ -48,20 +216,25 @@ def expected_number_of_keypresses(layout: Dict, distribution: List):
     return score
 
 
-s = entropy([p for (l, p) in letter_distribution])
-keys1 = [1, 2, 3, 4, 5, 6, 7, 8, 9, 0]
-keys2 = [2, 3, 4, 5, 6, 7, 8, 9]
-layout1, score1 = optimized_multi_tap_layout(keys1, letter_distribution)
-layout2, score2 = optimized_multi_tap_layout(keys2, letter_distribution)
-score_default = expected_number_of_keypresses(default_layout,
-                                              letter_distribution)
+if __name__ == "__main__":
+    s = entropy([p for (l, p) in letter_distribution])
+    keys1 = [1, 2, 3, 4, 5, 6, 7, 8, 9, 0]
+    keys2 = [2, 3, 4, 5, 6, 7, 8, 9]
+    layout1, score1 = optimized_multi_tap_layout(keys1, letter_distribution)
+    layout2, score2 = optimized_multi_tap_layout(keys2, letter_distribution)
+    score_default = expected_number_of_keypresses(default_layout,
+                                                  letter_distribution)
+    layout_ordered, score_ordered = ordered_multi_tap_layout(
+        keys2, letter_distribution)
 
-print(f"Entropy of English letter:\n{s}")
-print(f"Expected number of key presses with keys {keys1}:\n{score1}")
-print(f"Expected number of key presses with keys {keys2}:\n{score2}")
-print(f"Expected number of key presses with keys {keys2}:\n{score_default}")
-print(f"Ration between score2 and score_default:\n{score2/score_default}")
+    print(f"Entropy of English letter:\n{s}")
+    print(f"Expected number of key presses with keys {keys1}:\n{score1}")
+    print(f"Expected number of key presses with keys {keys2}:\n{score2}")
+    print(f"Expected number of key presses with keys {keys2}:\n{score_default}")
+    print(f"Ration between score2 and score_default:\n{score2/score_default}")
+    print(f"Expected number of key presses in alphabetical order with keys {keys2}:\n{score_ordered}")
 
-print(f"Optimal layout 1:{layout1}")
-print(f"Optimal layout 2:{layout2}")
-print(f"Default layout: {default_layout}")
+    print(f"Optimal layout 1:{layout1}")
+    print(f"Optimal layout 2:{layout2}")
+    print(f"Default layout: {default_layout}")
+    print(f"Optimal alphabetical layout: {layout_ordered}")
@@ -0,0 +1,196 @@
+"""
+N-gram statistics of a text corpus and the expected costs of text entry
+layouts computed from them.
+
+The counts of the n-grams of an alphabet are stored sparsely as a sorted
+array of the n-grams that occur, encoded as integers whose base
+`len(alphabet)` digits are the letter indices (the first letter is the most
+significant), and an array of their counts. A corpus is read in chunks, so
+that memory is bounded by the chunk size and the number of distinct n-grams.
+"""
+from typing import Dict, Iterable
+
+import numpy as np
+
+ALPHABET = 'abcdefghijklmnopqrstuvwxyz'
+
+
+class NgramCounts:
+    """
+    Counts of the n-grams of the letters in `alphabet`.
+    - Text is lowercased, and n-grams containing other characters are
+      skipped
+    - `update` adds a chunk of text; the last n-1 characters are carried
+      over to the next chunk, so that n-grams spanning chunks are counted
+    """
+
+    def __init__(self, n: int = 3, alphabet: str = ALPHABET):
+        self.n = n
+        self.alphabet = alphabet
+        self.base = len(alphabet)
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        # Letter index of each code point, -1 for other characters
+        self.table = np.full(max(map(ord, alphabet)) + 1, -1, dtype=np.int64)
+        for i, c in enumerate(alphabet):
+            self.table[ord(c)] = i
+        self.carry = np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def letters(self, text: str):
+        """Returns the letter indices of the characters of the text."""
+        points = np.frombuffer(text.lower().encode('utf-32-le'),
+                               dtype='<u4').astype(np.int64)
+        indices = np.full(len(points), -1, dtype=np.int64)
+        inside = points < len(self.table)
+        indices[inside] = self.table[points[inside]]
+        return indices
+
+    def update(self, text: str):
+        indices = np.concatenate((self.carry, self.letters(text)))
+        self.carry = indices[len(indices) - (self.n - 1):] \
+            if self.n > 1 else indices[:0]
+        m = len(indices) - self.n + 1
+        if m <= 0:
+            return self
+        codes = np.zeros(m, dtype=np.int64)
+        valid = np.ones(m, dtype=bool)
+        for j in range(self.n):
+            window = indices[j:j + m]
+            codes = codes * self.base + window
+            valid &= window >= 0
+        codes, counts = np.unique(codes[valid], return_counts=True)
+        self.merge(codes, counts)
+        return self
+
+    def merge(self, codes, counts):
+        """Adds the counts of sorted, unique codes."""
+        codes = np.concatenate((self.codes, codes))
+        counts = np.concatenate((self.counts, counts))
+        self.codes, inverse = np.unique(codes, return_inverse=True)
+        self.counts = np.bincount(inverse, weights=counts,
+                                  minlength=len(self.codes)).astype(np.int64)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterable[str], n: int = 3,
+                    alphabet: str = ALPHABET):
+        counts = cls(n, alphabet)
+        for chunk in chunks:
+            counts.update(chunk)
+        return counts
+
+    @classmethod
+    def from_file(cls, filename, n: int = 3, alphabet: str = ALPHABET,
+                  chunk_size: int = 2 ** 22, encoding='utf-8'):
+        """Counts the n-grams of a text file read `chunk_size` characters
+        at a time."""
+        with open(filename, 'r', encoding=encoding, errors='replace') as f:
+            return cls.from_chunks(iter(lambda: f.read(chunk_size), ''), n,
+                                   alphabet)
+
+    def digits(self):
+        """Returns the (ngrams, n) array of the letter indices of the
+        n-grams."""
+        powers = self.base ** np.arange(self.n - 1, -1, -1, dtype=np.int64)
+        return self.codes[:, None] // powers % self.base
+
+    def probabilities(self):
+        return self.counts / self.counts.sum()
+
+    def marginal(self, k: int):
+        """Returns the counts of the k-gram prefixes of the n-grams."""
+        marginal = NgramCounts(k, self.alphabet)
+        codes, inverse = np.unique(self.codes // self.base ** (self.n - k),
+                                   return_inverse=True)
+        marginal.codes = codes
+        marginal.counts = np.bincount(inverse, weights=self.counts,
+                                      minlength=len(codes)).astype(np.int64)
+        return marginal
+
+    def dense(self):
+        """Returns the counts as an array of shape (len(alphabet),) * n."""
+        counts = np.zeros(self.base ** self.n, dtype=np.int64)
+        counts[self.codes] = self.counts
+        return counts.reshape((self.base,) * self.n)
+
+    def ngrams(self) -> Dict[str, int]:
+        return {''.join(self.alphabet[i] for i in d): int(c)
+                for d, c in zip(self.digits(), self.counts)}
+
+
+def multi_tap_arrays(layouts: Iterable[Dict], alphabet: str = ALPHABET):
+    """
+    Returns the (layouts, letters) arrays of the key index and the number of
+    presses of each letter in multi-tap layouts given as {key: [letters]}
+    dicts (as in A_4_2_english_letter). Letters missing from a layout get
+    key -1 and 0 presses.
+    """
+    layouts = list(layouts)
+    keys = np.full((len(layouts), len(alphabet)), -1, dtype=np.int64)
+    presses = np.zeros((len(layouts), len(alphabet)), dtype=np.int64)
+    index = {c: i for i, c in enumerate(alphabet)}
+    for r, layout in enumerate(layouts):
+        for k, letters in enumerate(layout.values()):
+            for (i, l) in enumerate(letters):
+                keys[r, index[l]] = k
+                presses[r, index[l]] = i + 1
+    return keys, presses
+
+
+def _batches(ngrams: NgramCounts, layouts, batch_size):
+    """Yields the slices of the layouts of at most batch_size entries
+    gathered over all n-grams."""
+    step = max(1, batch_size // max(1, len(ngrams) * ngrams.n))
+    for start in range(0, len(layouts), step):
+        yield slice(start, start + step)
+
+
+def expected_keypresses(ngrams: NgramCounts, keys, presses, timeout=1.0,
+                        batch_size=2 ** 24):
+    """
+    Returns the expected number of key presses per letter of multi-tap
+    layouts (arrays from `multi_tap_arrays`) in the n-gram contexts.
+    - A letter costs its number of presses on its key, plus `timeout`
+      (in key presses) if the previous letter is on the same key; letters
+      missing from a layout are on no key
+    - The cost of the last letter of each n-gram is weighted by the n-gram
+      probability. The cost depends only on the previous letter, so only
+      the last two letters of longer n-grams matter
+    """
+    keys, presses = np.atleast_2d(keys), np.atleast_2d(presses)
+    digits = ngrams.digits()
+    p = ngrams.probabilities()
+    last = digits[:, -1]
+    scores = np.empty(len(keys))
+    for s in _batches(ngrams, keys, batch_size):
+        cost = presses[s][:, last].astype(float)
+        if ngrams.n > 1:
+            k = keys[s]
+            previous = k[:, digits[:, -2]]
+            cost += timeout * ((previous == k[:, last]) & (previous >= 0))
+        scores[s] = cost @ p
+    return scores
+
+
+def expected_movement_time(ngrams: NgramCounts, slots, movement_time,
+                           batch_size=2 ** 24):
+    """
+    Returns the expected movement time per letter of keyboard layouts.
+    - slots: (layouts, letters) array of the key slot of each letter
+    - movement_time: array over key slots of d <= n dimensions, indexed by
+      the slots of the last d letters of an n-gram, e.g. a (slots, slots)
+      Fitts' law matrix, or a (slots, slots, slots) array for movement
+      times that depend on the previous movement
+    """
+    slots = np.atleast_2d(slots)
+    movement_time = np.asarray(movement_time)
+    d = movement_time.ndim
+    digits = ngrams.digits()[:, ngrams.n - d:]
+    p = ngrams.probabilities()
+    scores = np.empty(len(slots))
+    for s in _batches(ngrams, slots, batch_size):
+        gathered = slots[s][:, digits]
+        scores[s] = movement_time[tuple(np.moveaxis(gathered, -1, 0))] @ p
+    return scores
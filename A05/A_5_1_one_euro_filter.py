@@ -1,9 +1,7 @@
 import math
 from os import makedirs
 
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas
 
 
 def low_pass_filter(a, x, x_prev):
@@ -47,6 +45,8 @@ class OneEuroFilter:
 
 
 def plots():
+    import matplotlib.pyplot as plt
+    import pandas
     df = pandas.read_csv("A_5_1_noise.csv")
     t, x = df.values[:, 0], df.values[:, 1]
 
@@ -74,6 +74,8 @@ def plots():
 
 
 def plot_signal():
+    import matplotlib.pyplot as plt
+    import pandas
     import seaborn
     seaborn.set()
     df = pandas.read_csv("A_5_1_noise.csv")
@@ -87,6 +89,8 @@ def plot_signal():
 
 
 def plot_filtered_signal(min_cutoff=0.008, beta=0.002):
+    import matplotlib.pyplot as plt
+    import pandas
     import seaborn
     seaborn.set()
     df = pandas.read_csv("A_5_1_noise.csv")
@@ -0,0 +1,2 @@
+"""The 1€ filter of assignment 5.1, e.g. `from A05 import OneEuroFilter`."""
+from .A_5_1_one_euro_filter import OneEuroFilter
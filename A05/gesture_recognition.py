@@ -1,14 +1,8 @@
 import os
 from typing import Dict, List
 
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
 from numpy.linalg import norm
-from sklearn import svm
-from sklearn.metrics import classification_report, confusion_matrix
-from sklearn.model_selection import cross_val_score, KFold
-from sklearn.preprocessing import MinMaxScaler
 
 
 def parse(filepath) -> Dict[str, List[float]]:
@@ -83,6 +77,8 @@ def distplot(features, labels):
     feature_names = [f'A_{i}' for i in range(5)] + \
                     [f'D_{i}' for i in range(4)] + \
                     [f'E_{i}' for i in range(5)]
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     sns.set()
     for i, name in enumerate(feature_names):
         plt.figure()
@@ -95,25 +91,30 @@ def distplot(features, labels):
         plt.show()
 
 
-features, labels = features_and_labels()
-scaler = MinMaxScaler((0.5, 1))
-scaler.fit(features)
-X = scaler.transform(features)
-y = labels
-X[np.isnan(X)] = 0
+if __name__ == "__main__":
+    from sklearn import svm
+    from sklearn.metrics import classification_report, confusion_matrix
+    from sklearn.model_selection import cross_val_score, KFold
+    from sklearn.preprocessing import MinMaxScaler
 
-# distplot(X, y)
+    features, labels = features_and_labels()
+    scaler = MinMaxScaler((0.5, 1))
+    scaler.fit(features)
+    X = scaler.transform(features)
+    y = labels
+    X[np.isnan(X)] = 0
 
+    # distplot(X, y)
 
-# SVM model
-random_state = 3
-clf = svm.SVC(C=2.0, kernel="linear")
-cv = KFold(n_splits=5, shuffle=True, random_state=random_state)
-scores = cross_val_score(clf, X, y, cv=cv)
+    # SVM model
+    random_state = 3
+    clf = svm.SVC(C=2.0, kernel="linear")
+    cv = KFold(n_splits=5, shuffle=True, random_state=random_state)
+    scores = cross_val_score(clf, X, y, cv=cv)
 
-print(f"Accuracy: {scores.mean():.2f} (+/- {2*scores.std():0.2f})")
+    print(f"Accuracy: {scores.mean():.2f} (+/- {2*scores.std():0.2f})")
 
-clf.fit(X, y)
-y_pred = clf.predict(X)
-print(classification_report(y, y_pred))
-print(confusion_matrix(y, y_pred))
+    clf.fit(X, y)
+    y_pred = clf.predict(X)
+    print(classification_report(y, y_pred))
+    print(confusion_matrix(y, y_pred))
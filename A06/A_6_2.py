@@ -1,6 +1,4 @@
 import numpy as np
-from GPyOpt.methods import BayesianOptimization
-import matplotlib.pyplot as plt
 
 
 def f(x):
@@ -17,6 +15,7 @@ def f(x):
         int:
         The user given grade for the color `x`.
     """
+    import matplotlib.pyplot as plt
     print(x)
     im = x.reshape(1, 1, 3).repeat(3, axis=0).repeat(3, axis=1)
     plt.figure(1)
@@ -34,10 +33,13 @@ def g(x):
     return f(np.array([x, x, x]))
 
 
-domain = [{'name': 'color',
-           'type': 'discrete',
-           'domain': list(range(0, 255))}]
-opt = BayesianOptimization(g, domain=domain, exact_feval=True, maximize=True)
-opt.run_optimization(max_iter=2)
-opt.plot_acquisition()
-print(opt.x_opt, opt.fx_opt)
+if __name__ == "__main__":
+    from GPyOpt.methods import BayesianOptimization
+
+    domain = [{'name': 'color',
+               'type': 'discrete',
+               'domain': list(range(0, 255))}]
+    opt = BayesianOptimization(g, domain=domain, exact_feval=True, maximize=True)
+    opt.run_optimization(max_iter=2)
+    opt.plot_acquisition()
+    print(opt.x_opt, opt.fx_opt)
@@ -1,7 +1,5 @@
-from gurobipy import GRB, quicksum
-
 import numpy as np
-from gurobi import Model
+from scipy.optimize import linear_sum_assignment
 
 
 # Returns Euclidean distance between two element positions in a grid layout
@@ -10,7 +8,87 @@ def dist(columns, i, j):
                    abs(i % columns - j % columns) ** 2)
 
 
-def solve(elements, positions, frequency, distance):
+def separable(cost):
+    """
+    Returns vectors (u, v) such that `cost = np.outer(u, v)`, or None if the
+    cost matrix is not separable.
+    """
+    i, j = np.unravel_index(np.argmax(np.abs(cost)), cost.shape)
+    if cost[i, j] == 0:
+        return cost[:, 0], cost[0]
+    u, v = cost[:, j], cost[i] / cost[i, j]
+    # The tolerance is relative to the largest cost, so that small costs
+    # are not taken as equal.
+    if np.allclose(np.outer(u, v), cost, atol=1e-12 * abs(cost[i, j])):
+        return u, v
+    return None
+
+
+def assign(cost):
+    """
+    Returns the position of each element (row) that minimizes the total cost
+    of a linear assignment with the given cost matrix.
+    - A separable cost u[e] * v[p] is minimized by pairing the largest u
+      with the smallest v (rearrangement inequality), which is a sort
+    - Otherwise the Hungarian method is used
+    """
+    uv = separable(cost)
+    if uv is not None:
+        u, v = uv
+        assignment = np.empty(len(u), dtype=np.intp)
+        assignment[np.argsort(-u, kind="stable")] = np.argsort(v, kind="stable")
+        return assignment
+    rows, cols = linear_sum_assignment(cost)
+    return cols[np.argsort(rows)]
+
+
+def solve(elements, positions, frequency, distance, solver="auto"):
+    """
+    Returns the layout (list of elements by position) that minimizes the
+    expected selection time, and the expected selection time.
+    - "auto" solves the linear assignment with `assign`, "gurobi" with the
+      MIP of `solve_mip`
+    """
+    if solver == "gurobi":
+        return solve_mip(elements, positions, frequency, distance)
+    reading_cost = 0.4  # assumed that scanning a single item takes 400 ms
+    cost = np.outer([frequency[e] for e in elements],
+                    [distance[p] * reading_cost for p in positions])
+    assignment = assign(cost)
+    layout = [None] * len(elements)
+    for e, p in zip(elements, assignment):
+        layout[positions[p]] = e
+    return layout, float(cost[np.arange(len(elements)), assignment].sum())
+
+
+def solve_batch(frequencies, distance):
+    """
+    Solves many menus with the same positions at once.
+    - frequencies: (menus, elements) array of element frequencies
+    - distance: (positions,) array of position distances
+    - Returns a (menus, positions) array of element indices by position and
+      the expected selection time of each menu
+    """
+    reading_cost = 0.4
+    frequencies = np.asarray(frequencies)
+    distance = np.asarray(distance)
+    elements = np.argsort(-frequencies, axis=1, kind="stable")
+    positions = np.argsort(distance, kind="stable")
+    layouts = np.empty_like(elements)
+    layouts[:, positions] = elements
+    costs = np.take_along_axis(frequencies, layouts, axis=1) @ \
+            distance * reading_cost
+    return layouts, costs
+
+
+def solve_mip(elements, positions, frequency, distance):
+    """
+    Solves the assignment as a binary MIP with Gurobi, which is only needed
+    when the model is extended with side constraints.
+    """
+    from gurobipy import GRB, quicksum
+    from gurobi import Model
+
     # ==== 1. Create the (empty) model ====
     model = Model("linear_menu")
 
@@ -62,37 +140,106 @@ def solve(elements, positions, frequency, distance):
     return layout, model.getObjective().getValue()
 
 
-def solve2(elements, positions, f1, w1, f2, w2, distance):
+def solve2(elements, positions, f1, w1, f2, w2, distance, solver="auto"):
     assert w1 > 0 and w2 > 0 and w1 + w2 == 1
     frequency = dict()
     for e in elements:
         frequency[e] = w1 * f1[e] + w2 * f2[e]
-    return solve(elements, positions, frequency, distance)
-
-
-# define elements and positions
-elements = ['Open', 'About', 'Quit', 'Help', 'Close',
-            'Save', 'Edit', 'Insert', 'Delete']
-positions = list(range(len(elements)))
-
-# define cost factors
-distance = list(map(lambda p: dist(1, 0, p), positions))
-
-f1 = {'Quit': 0.3, 'About': 0.2, 'Open': 0.1, 'Save': 0.1, 'Close': 0.05,
-      'Help': 0.02, 'Edit': 0.08, 'Insert': 0.1, 'Delete': 0.05}
-f2 = {'Quit': 0.02, 'About': 0.1, 'Open': 0.3, 'Save': 0.2, 'Close': 0.1,
-      'Help': 0.05, 'Edit': 0.05, 'Insert': 0.1, 'Delete': 0.08}
-w1 = 0.5
-w2 = 1 - w1
-
-# solve the problem
-layout1, objective1 = solve(elements, positions, f1, distance)
-layout2, objective2 = solve(elements, positions, f2, distance)
-layout, objective = solve2(elements, positions, f1, w1, f2, w2, distance)
-
-# Print the solution
-print("Objective value (expected selection time):", objective)
-print()
-print("Layout 1:        ", layout1, "Objective value:", objective1)
-print("Layout 2:        ", layout2, "Objective value:", objective1)
-print("Combined Layout: ", layout, "Objective value:", objective)
+    return solve(elements, positions, frequency, distance, solver)
+
+
+class MenuModel:
+    """
+    A Gurobi MIP of the linear menu that is built once and re-solved for
+    different frequencies, e.g. for sweeping the weights of `solve2`.
+    - The variables and assignment constraints are created in the
+      constructor, and `solve` only updates the objective coefficients
+    - Each solve is warm-started from the previous solution
+    """
+
+    def __init__(self, elements, positions, distance):
+        from gurobipy import GRB, quicksum
+        from gurobi import Model
+
+        self.elements = elements
+        self.positions = positions
+        self.distance = distance
+        self.model = Model("linear_menu")
+        self.model.Params.OutputFlag = 0
+        self.x = {}
+        for e in elements:
+            for p in positions:
+                self.x[(e, p)] = self.model.addVar(vtype=GRB.BINARY,
+                                                   name="%s_%i" % (e, p))
+        self.model.update()
+        for p in positions:
+            self.model.addConstr(
+                quicksum(self.x[(e, p)] for e in elements) == 1,
+                "uniqueness_constraint_%i" % p)
+        for e in elements:
+            self.model.addConstr(
+                quicksum(self.x[(e, p)] for p in positions) == 1,
+                "uniqueness_constraint_%s" % e)
+        self.model.ModelSense = GRB.MINIMIZE
+        self.model.update()
+
+    def solve(self, frequency):
+        """Returns the optimal layout and objective value for `frequency`."""
+        reading_cost = 0.4  # assumed that scanning a single item takes 400 ms
+        # Read the previous solution before the model is modified
+        start = {key: x.X for key, x in self.x.items()} \
+            if self.model.SolCount > 0 else {}
+        for (e, p), x in self.x.items():
+            x.Obj = frequency[e] * self.distance[p] * reading_cost
+            if start:
+                x.Start = start[(e, p)]
+        self.model.optimize()
+
+        layout = [None] * len(self.elements)
+        for (e, p), x in self.x.items():
+            if x.X > 0.5:
+                layout[p] = e
+        return layout, self.model.ObjVal
+
+    def sweep(self, f1, f2, weights):
+        """
+        Solves the combined frequencies `w1 * f1 + (1 - w1) * f2` of `solve2`
+        for each w1 in `weights`, and returns a table of (w1, w2, layout,
+        objective value) rows.
+        """
+        table = []
+        for w1 in weights:
+            w2 = 1 - w1
+            frequency = {e: w1 * f1[e] + w2 * f2[e] for e in self.elements}
+            layout, objective = self.solve(frequency)
+            table.append((w1, w2, layout, objective))
+        return table
+
+
+if __name__ == "__main__":
+    # define elements and positions
+    elements = ['Open', 'About', 'Quit', 'Help', 'Close',
+                'Save', 'Edit', 'Insert', 'Delete']
+    positions = list(range(len(elements)))
+
+    # define cost factors
+    distance = list(map(lambda p: dist(1, 0, p), positions))
+
+    f1 = {'Quit': 0.3, 'About': 0.2, 'Open': 0.1, 'Save': 0.1, 'Close': 0.05,
+          'Help': 0.02, 'Edit': 0.08, 'Insert': 0.1, 'Delete': 0.05}
+    f2 = {'Quit': 0.02, 'About': 0.1, 'Open': 0.3, 'Save': 0.2, 'Close': 0.1,
+          'Help': 0.05, 'Edit': 0.05, 'Insert': 0.1, 'Delete': 0.08}
+    w1 = 0.5
+    w2 = 1 - w1
+
+    # solve the problem
+    layout1, objective1 = solve(elements, positions, f1, distance)
+    layout2, objective2 = solve(elements, positions, f2, distance)
+    layout, objective = solve2(elements, positions, f1, w1, f2, w2, distance)
+
+    # Print the solution
+    print("Objective value (expected selection time):", objective)
+    print()
+    print("Layout 1:        ", layout1, "Objective value:", objective1)
+    print("Layout 2:        ", layout2, "Objective value:", objective1)
+    print("Combined Layout: ", layout, "Objective value:", objective)
@@ -1,8 +1,6 @@
-from gurobipy import GRB, quicksum
 from math import log2
 
 import numpy as np
-from gurobi import Model
 
 
 # Returns Euclidean distance between two element positions in a grid layout
@@ -11,11 +9,74 @@ def dist(columns, i, j):
                    abs(i % columns - j % columns) ** 2)
 
 
-def solve(elements, positions, frequency, distance, rows, columns, colocated):
+def adjacent_positions(rows, columns, n):
+    """
+    Returns the ordered pairs (p, q) of horizontally or vertically adjacent
+    positions among the first n positions of a grid.
+    """
+    pairs = []
+    for i in range(rows):
+        for j in range(columns):
+            p = i * columns + j
+            for q in [p + 1 if j + 1 < columns else None, p + columns]:
+                if q is not None and p < n and q < n:
+                    pairs += [(p, q), (q, p)]
+    return pairs
+
+
+def greedy_layout(elements, positions, frequency, distance, rows, columns,
+                  colocated):
+    """
+    A heuristic layout for warm-starting `solve`: the most frequent elements
+    are placed in the nearest positions, and then one element of each
+    colocated pair is swapped next to the other one, without moving the
+    elements of the pairs placed before. Returns None if a pair could not
+    be placed.
+    """
+    n = len(positions)
+    layout = [None] * n
+    for e, p in zip(sorted(elements, key=lambda e: -frequency[e]),
+                    sorted(positions, key=lambda p: distance[p])):
+        layout[p] = e
+    adjacent = adjacent_positions(rows, columns, n)
+    fixed = set()
+    for (e1, e2) in colocated:
+        p1, p2 = layout.index(e1), layout.index(e2)
+        if (p1, p2) not in adjacent:
+            # Move e2 (or else e1) to the free position next to the other
+            # element that is nearest to the origin.
+            for (a, b, e) in [(p1, p2, e2), (p2, p1, e1)]:
+                free = [q for (p, q) in adjacent if p == a and q not in fixed]
+                if b not in fixed and free:
+                    q = min(free, key=lambda q: distance[q])
+                    layout[b], layout[q] = layout[q], e
+                    break
+            p1, p2 = layout.index(e1), layout.index(e2)
+        fixed.update([p1, p2])
+    if any((layout.index(e1), layout.index(e2)) not in adjacent
+           for (e1, e2) in colocated):
+        return None
+    return layout
+
+
+def solve(elements, positions, frequency, distance, rows, columns, colocated,
+          start=None, time_limit=None, mip_gap=None):
+    """
+    - colocated: pairs of elements that must be in adjacent positions
+    - start: a layout to warm-start the solver from, e.g. `greedy_layout`
+    - time_limit: in seconds; mip_gap: relative optimality gap to stop at
+    """
+    from gurobipy import GRB, quicksum
+    from gurobi import Model
+
     # ==== 1. Create the (empty) model ====
     if colocated is None:
         colocated = []
     model = Model("linear_menu")
+    if time_limit is not None:
+        model.Params.TimeLimit = time_limit
+    if mip_gap is not None:
+        model.Params.MIPGap = mip_gap
 
     # ==== 2. Add decision variables ======
     x = {}
@@ -25,6 +86,16 @@ def solve(elements, positions, frequency, distance, rows, columns, colocated):
     for e in elements:
         for p in positions:
             x[(e, p)] = model.addVar(vtype=GRB.BINARY, name="%s_%i" % (e, p))
+
+    # Colocation of e1 and e2 in adjacent positions p and q is the product
+    # x[(e1, p)] * x[(e2, q)], which is linearized with a continuous variable
+    # y[(p, q)] in [0, 1] bounded by both factors (see constraints).
+    adjacent = adjacent_positions(rows, columns, len(positions))
+    y = {}
+    for (e1, e2) in colocated:
+        for (p, q) in adjacent:
+            y[(e1, e2, p, q)] = model.addVar(
+                lb=0, ub=1, name="y_%s_%s_%i_%i" % (e1, e2, p, q))
     # Integrate new variables
     model.update()
 
@@ -41,15 +112,18 @@ def solve(elements, positions, frequency, distance, rows, columns, colocated):
 
     # Add constraints to items that should be colocated.
     for (e1, e2) in colocated:
-        # 1. same row
-        # 2. same column
+        # The adjacency variables from position p are bounded by e1 being in
+        # p, and the adjacency variables to position q by e2 being in q.
+        for p in positions:
+            model.addConstr(
+                quicksum(y[(e1, e2, p, q)] for (p_, q) in adjacent if p_ == p)
+                <= x[(e1, p)])
+            model.addConstr(
+                quicksum(y[(e1, e2, p_, p)] for (p_, q) in adjacent if q == p)
+                <= x[(e2, p)])
+        # Exactly one pair of adjacent positions holds e1 and e2.
         model.addConstr(
-            quicksum([x[(e1, i*columns+j)] * x[(e2, i*columns+(j+1))] +
-                      x[(e2, i*columns+j)] * x[(e1, i*columns+(j+1))] +
-                      x[(e1, i * columns + j)] * x[(e2, (i + 1) * columns + j)] +
-                      x[(e2, i * columns + j)] * x[(e1, (i + 1) * columns + j)]
-                      for i in range(rows-1)
-                      for j in range(columns-1)]) == 1,
+            quicksum(y[(e1, e2, p, q)] for (p, q) in adjacent) == 1,
             f"Elements {e1}{e2} are colocated")
 
     model.update()
@@ -66,17 +140,20 @@ def solve(elements, positions, frequency, distance, rows, columns, colocated):
     model.setObjective(cost, GRB.MINIMIZE)
 
     # ==== 5. Optimize model ======
+    if start is not None:
+        for (e, p) in x:
+            x[(e, p)].Start = 0
+        for (p, e) in enumerate(start):
+            x[(e, p)].Start = 1
     model.optimize()
 
     # ====6. Extract solution ======
     layout = [None] * len(elements)
     # create the layout (ordered list of elements) from the variables
     # that are set to 1
-    for v in model.getVars():
-        if v.x == 1:
-            element = v.varName.split("_")[0]
-            position = int(v.varName.split("_")[1])
-            layout[position] = element
+    for (e, p) in x:
+        if x[(e, p)].X > 0.5:
+            layout[p] = e
 
     return layout, model.getObjective().getValue()
 
@@ -86,38 +163,41 @@ def random_frequecies(n):
     return s / np.sum(s)
 
 
-# Set random state
-# np.random.seed(2576)
-
-# define elements and positions
-n = 16
-columns = 4
-rows = n // columns
-
-elements = list(range(n))
-positions = list(range(len(elements)))
-colocated = [(elements[1], elements[5])]
-
-# define cost factors
-frequency = {e: f for (e, f) in zip(elements, random_frequecies(n))}
-distance = list(map(lambda p: dist(columns, 0, p), positions))
-
-# solve the problem
-layout1, objective1 = solve(elements, positions, frequency, distance, rows,
-                            columns, [])
-layout2, objective2 = solve(elements, positions, frequency, distance, rows,
-                            columns, colocated)
-
-# Print the solution
-# print("Objective value (expected selection time):", objective)
-
-# Lets reshape the result into 4x4 matrix and mirror the layout along x-axis
-# because the distance should be measured from bottom-left corner.
-print()
-print(f"Layout with no colocated items:")
-print(np.flip(np.array(layout1).reshape((rows, columns)), axis=0))
-print("Objective value: ", objective1)
-print()
-print(f"Layout with colocated items {colocated}:")
-print(np.flip(np.array(layout2).reshape((rows, columns)), axis=0))
-print("Objective value: ", objective2)
+if __name__ == "__main__":
+    # Set random state
+    # np.random.seed(2576)
+
+    # define elements and positions
+    n = 16
+    columns = 4
+    rows = n // columns
+
+    elements = list(range(n))
+    positions = list(range(len(elements)))
+    colocated = [(elements[1], elements[5])]
+
+    # define cost factors
+    frequency = {e: f for (e, f) in zip(elements, random_frequecies(n))}
+    distance = list(map(lambda p: dist(columns, 0, p), positions))
+
+    # solve the problem
+    layout1, objective1 = solve(elements, positions, frequency, distance, rows,
+                                columns, [])
+    start = greedy_layout(elements, positions, frequency, distance, rows, columns,
+                          colocated)
+    layout2, objective2 = solve(elements, positions, frequency, distance, rows,
+                                columns, colocated, start)
+
+    # Print the solution
+    # print("Objective value (expected selection time):", objective)
+
+    # Lets reshape the result into 4x4 matrix and mirror the layout along x-axis
+    # because the distance should be measured from bottom-left corner.
+    print()
+    print(f"Layout with no colocated items:")
+    print(np.flip(np.array(layout1).reshape((rows, columns)), axis=0))
+    print("Objective value: ", objective1)
+    print()
+    print(f"Layout with colocated items {colocated}:")
+    print(np.flip(np.array(layout2).reshape((rows, columns)), axis=0))
+    print("Objective value: ", objective2)
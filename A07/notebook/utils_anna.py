@@ -1,5 +1,6 @@
 import numpy as np
 import math
+import hashlib
 import re, os
 
 
@@ -13,40 +14,81 @@ def wpm(avg_iki_in_s):
     """ Computes the average words per minute that could be achieved with
     a keyboard from the given avg inter-key interval
     """
-    if avg_iki_in_s == 0:
-        return 0
-    else:
-        return (1.0 / avg_iki_in_s * 60) / 5
+    if np.ndim(avg_iki_in_s) == 0:
+        if avg_iki_in_s == 0:
+            return 0
+        else:
+            return (1.0 / avg_iki_in_s * 60) / 5
+    # An array of intervals, e.g. from KeyboardCost.iki_batch
+    iki = np.asarray(avg_iki_in_s, dtype=float)
+    safe = np.where(iki == 0, 1.0, iki)
+    return np.where(iki == 0, 0.0, (1.0 / safe * 60) / 5)
+
+
+# Unquoting of the bigrams that contain quotes, in the order applied
+_UNQUOTE = [(re.compile('"\t'), '\t'), (re.compile('""'), '"'),
+            (re.compile('^"'), '')]
 
 
-def get_bigram_frequency(letters):
+def read_bigrams(filename="resources/stylus.csv"):
+    """
+    Streams the (bigram, frequency) pairs of a tab-separated bigram file.
+    """
+    with open(filename, 'r', newline='') as f:
+        for line in f:
+            if len(line) > 4 and line[4] == "\"":
+                for pattern, replacement in _UNQUOTE:
+                    line = pattern.sub(replacement, line)
+            line = line.rstrip('\r\n')
+            if len(line) > 1:
+                parts = line.split('\t', 2)
+                yield parts[0], float(parts[1])
+
+
+def get_bigram_frequency(letters, filename="resources/stylus.csv"):
     """
         reads the .csv file containing the bigram frequencies
         Returns a map from bigrams to frequencies
     """
+    letters = set(letters)
     bigramdist = {}
-    f = open("resources/stylus.csv", 'r')
-    lines = f.readlines()
-    for line in lines:
-        if line[4] == "\"":
-            line = re.sub('\"\t', '\t', line)
-            line = re.sub('\"\"', '\"', line)
-            line = re.sub('^\"', '', line)
-        line = re.sub(r'\r', '', line)
-        line = re.sub(r'\n', '', line)
-        if len(line) > 1:
-            parts = re.split('\t', line)
-            bigram = parts[0]
-            if bigram[0] in letters and bigram[1] in letters:
-                bigramdist[bigram[0], bigram[1]] = float(parts[1])
-        # normalize
-        s = np.sum(bigramdist.values())
-
-        for c, v in bigramdist.iteritems():
-            bigramdist[c] = v / s
+    for bigram, frequency in read_bigrams(filename):
+        if bigram[0] in letters and bigram[1] in letters:
+            bigramdist[bigram[0], bigram[1]] = frequency
+    # normalize
+    s = sum(bigramdist.values())
+    for c, v in bigramdist.items():
+        bigramdist[c] = v / s
     return bigramdist
 
 
+def bigram_frequency_matrix(letters, filename="resources/stylus.csv",
+                            cache=True):
+    """
+    Returns the normalized bigram frequencies as a matrix indexed by the
+    positions of the letters in `letters` (see bigram_matrix).
+    - With `cache`, the matrix is saved next to the file as a .npz file
+      per set of letters, together with the modification time of the file,
+      and later calls load it instead of parsing the file. The cached
+      matrix is replaced when the file has changed
+    """
+    letters = list(letters)
+    if cache:
+        mtime = os.stat(filename).st_mtime_ns
+        key = hashlib.sha1(repr(letters).encode()).hexdigest()[:16]
+        cached = "%s.%s.npz" % (filename, key)
+        if os.path.exists(cached):
+            with np.load(cached) as data:
+                if int(data['mtime']) == mtime:
+                    return data['F']
+    F = bigram_matrix(get_bigram_frequency(letters, filename), letters)
+    if cache:
+        with open(cached + '.tmp', 'wb') as out:
+            np.savez(out, F=F, mtime=np.array(mtime))
+        os.replace(cached + '.tmp', cached)
+    return F
+
+
 def fittslawcost(i, j, D):
     """
         Returns the fitts law cost for pointing from key i to key j.
@@ -65,3 +107,91 @@ def fittslawcost(i, j, D):
     else:
         mt = a + b * math.log(D / W + 1, 2)
     return mt
+
+
+def movement_time_matrix(keyslots, columns, W=1.0):
+    """
+    Returns the matrix of Fitts' law movement times between all pairs of
+    key slots, such that entry [s, t] equals
+    fittslawcost(keyslots[s], keyslots[t], distance(columns, ...)).
+    """
+    a = 0.0
+    b = 0.204
+    arep = 0.127
+    keyslots = np.asarray(keyslots)
+    D = distance(columns, keyslots[:, None], keyslots[None, :])
+    mt = a + b * np.log2(D / W + 1)
+    repeat = keyslots[:, None] == keyslots[None, :]
+    mt[repeat] += arep - a
+    return mt
+
+
+def bigram_matrix(bigram_frequency, letters):
+    """
+    Returns the bigram frequencies (a map from letter pairs to frequencies,
+    as returned by get_bigram_frequency) as a dense array indexed by the
+    positions of the letters in `letters`. A matrix is returned as is.
+    """
+    if isinstance(bigram_frequency, np.ndarray):
+        return bigram_frequency
+    index = {c: i for i, c in enumerate(letters)}
+    F = np.zeros((len(letters), len(letters)))
+    for (c1, c2), f in bigram_frequency.items():
+        if c1 in index and c2 in index:
+            F[index[c1], index[c2]] = f
+    return F
+
+
+class KeyboardCost:
+    """
+    Expected inter-key interval (IKI) of keyboard layouts.
+    - The movement times between key slots and the bigram frequencies are
+      precomputed as matrices, so the IKI of a layout is one weighted sum
+      over the movement times gathered for the bigrams
+    - A layout is an integer array with the index (in `keyslots`) of the
+      slot of each letter, in the order of `letters`; `encode` and `decode`
+      convert from and to the letter->slot mappings of the solvers
+    - `iki_batch` scores an (m, letters) array of layouts at once
+    """
+
+    def __init__(self, letters, keyslots, columns, bigram_frequency):
+        self.letters = list(letters)
+        self.keyslots = list(keyslots)
+        self.movement_time = movement_time_matrix(self.keyslots, columns)
+        self.bigrams = bigram_matrix(bigram_frequency, self.letters)
+        # Only the bigrams that occur are gathered
+        self.first, self.second = np.nonzero(self.bigrams)
+        self.weights = self.bigrams[self.first, self.second]
+
+    def encode(self, mapping):
+        return np.array([self.keyslots.index(mapping[c])
+                         for c in self.letters])
+
+    def decode(self, layout):
+        return {c: self.keyslots[s] for c, s in zip(self.letters, layout)}
+
+    def iki(self, layout):
+        layout = np.asarray(layout)
+        return float(self.movement_time[layout[self.first],
+                                        layout[self.second]] @ self.weights)
+
+    def iki_batch(self, layouts, batch_size=2 ** 16):
+        layouts = np.asarray(layouts)
+        iki = np.empty(len(layouts))
+        for start in range(0, len(layouts), batch_size):
+            batch = layouts[start:start + batch_size]
+            iki[start:start + batch_size] = self.movement_time[
+                batch[:, self.first], batch[:, self.second]] @ self.weights
+        return iki
+
+    def wpm(self, layout):
+        return wpm(self.iki(layout))
+
+    def wpm_batch(self, layouts):
+        return wpm(self.iki_batch(layouts))
+
+    def random_layouts(self, m, rng=None):
+        """Returns m random layouts, which may leave some key slots empty."""
+        rng = np.random.default_rng(rng)
+        slots = np.argsort(rng.random((m, len(self.keyslots))), axis=1)
+        return slots[:, :len(self.letters)]
@@ -3,8 +3,6 @@ from collections import defaultdict
 from contextlib import redirect_stdout
 from io import StringIO
 
-from transitions.extensions import GraphMachine as Machine
-
 
 def dfs(graph, start):
     # https://eddmann.com/posts/depth-first-search-and-breadth-first-search-in-python/
@@ -62,16 +60,19 @@ transitions = [
     ['action_7', 'E', 'D'],
 ]
 
-for model in [Model1(), Model2()]:
-    machine = Machine(model, states=states, initial=initial,
-                      transitions=transitions)
-    graph = machine.get_graph()
-    graph.draw(f'figures/{model}.png', prog='dot')
-
-    print(f"Testing model {model}")
-    print("Testing visibility:")
-    test_visibility(model, states)
-    print("Testing weak task completeness:")
-    test_weak_task_completeness(transitions, 'A', 'D')
-    test_weak_task_completeness(transitions, 'E', 'A')
-    print()
+if __name__ == "__main__":
+    from transitions.extensions import GraphMachine as Machine
+
+    for model in [Model1(), Model2()]:
+        machine = Machine(model, states=states, initial=initial,
+                          transitions=transitions)
+        graph = machine.get_graph()
+        graph.draw(f'figures/{model}.png', prog='dot')
+
+        print(f"Testing model {model}")
+        print("Testing visibility:")
+        test_visibility(model, states)
+        print("Testing weak task completeness:")
+        test_weak_task_completeness(transitions, 'A', 'D')
+        test_weak_task_completeness(transitions, 'E', 'A')
+        print()
@@ -4,8 +4,6 @@ from functools import partial
 from random import uniform
 
 import numpy as np
-import scipy.stats
-import matplotlib.pyplot as plt
 
 
 class BernoulliUniformBandit(object):
@@ -115,42 +113,45 @@ def run_solver(solver, trials=20, iterations=1000):
     print(solver.name, np.mean(regret_history), "+/-", np.std(regret_history))
 
 
-# TODO: 5 different bandits
-thetas1 = [0.15, 0.30, 0.60]
-lows1 = highs1 = [3, 2, 1]
-bandit1 = BernoulliUniformBandit(len(thetas1), thetas1, lows1, highs1)
-
-lows2 = [2, 1, 1]
-highs2 = [2, 3, 2]
-bandit2 = BernoulliUniformBandit(len(thetas1), thetas1, lows2, highs2)
-
-# Select one of the bandit instances
-bandit = bandit2
-
-# Instantiate solvers
-solvers = [
-    EpsilonGreedy(bandit, 0.1, 0.0),
-    EpsilonGreedy(bandit, 1.0, 0.8),
-    EpsilonGreedy(bandit, 1.0, 1 / 2)
-]
-
-# Run experiment for each solver
-
-for solver in solvers:
-    num_trials = 20
-    num_iterations = 1000
-    run_solver(solver, num_trials, num_iterations)
-    action_count = []
-    for arm in range(bandit.n):
-        action_count.append(solver.actions.count(arm) / num_trials)
-    print("Actions per arm: ", action_count,
-          "\n")  # Print number of times each arm was pulled
-
-plt.figure()
-for solver in solvers:
-    plt.plot(solver.regrets, label=solver.name)
-
-plt.legend()
-plt.xlabel('time step')
-plt.ylabel('cumulative regret')
-plt.show()
+if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
+    # TODO: 5 different bandits
+    thetas1 = [0.15, 0.30, 0.60]
+    lows1 = highs1 = [3, 2, 1]
+    bandit1 = BernoulliUniformBandit(len(thetas1), thetas1, lows1, highs1)
+
+    lows2 = [2, 1, 1]
+    highs2 = [2, 3, 2]
+    bandit2 = BernoulliUniformBandit(len(thetas1), thetas1, lows2, highs2)
+
+    # Select one of the bandit instances
+    bandit = bandit2
+
+    # Instantiate solvers
+    solvers = [
+        EpsilonGreedy(bandit, 0.1, 0.0),
+        EpsilonGreedy(bandit, 1.0, 0.8),
+        EpsilonGreedy(bandit, 1.0, 1 / 2)
+    ]
+
+    # Run experiment for each solver
+
+    for solver in solvers:
+        num_trials = 20
+        num_iterations = 1000
+        run_solver(solver, num_trials, num_iterations)
+        action_count = []
+        for arm in range(bandit.n):
+            action_count.append(solver.actions.count(arm) / num_trials)
+        print("Actions per arm: ", action_count,
+              "\n")  # Print number of times each arm was pulled
+
+    plt.figure()
+    for solver in solvers:
+        plt.plot(solver.regrets, label=solver.name)
+
+    plt.legend()
+    plt.xlabel('time step')
+    plt.ylabel('cumulative regret')
+    plt.show()
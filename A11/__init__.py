@@ -0,0 +1,3 @@
+"""The bandits and solvers of assignment 11.1."""
+from .A_11_1_bandits import (BernoulliUniformBandit, EpsilonGreedy, Solver,
+                             run_solver)
@@ -0,0 +1,2 @@
+"""The Q-learning MDP agent of assignment 12."""
+from .mdp import mdp
@@ -1,4 +1,6 @@
 from operator import itemgetter # getting max q from a dict
+import json
+import os
 import random
 
 class mdp():
@@ -192,21 +194,37 @@ class mdp():
             # memory, but the task starts again.
             self.reset()
 
-# Create the agent.
-agent = mdp()
-print("Training the model...")
-# Learn the model multiple times. This takes some seconds to run.
-for i in range(0, 1000000):
-    agent.iterate_model()
-# Print the learned Q-values.
-agent.print_q()
-
-# Make one iteration. Useful if you wish to step the agent to see how it behaves.
-agent.epsilon = 0 # just exploit to see the optimal behaviour and no exploration
-agent.reset()
-agent.print_state()
-agent.print_q(agent.state)
-agent.iterate_model(print_progress = True)
-agent.print_state()
-agent.print_q(agent.state)
-agent.iterate_model(print_progress = True)
+    # Save the Q table to a JSON file, and load it back, so that a
+    # trained agent can be reused without training it again.
+    def save_q(self, filename):
+        with open(filename, "w") as out:
+            json.dump(self.q, out)
+
+    def load_q(self, filename):
+        with open(filename) as f:
+            self.q = json.load(f)
+
+if __name__ == "__main__":
+    # Create the agent.
+    agent = mdp()
+    print("Training the model...")
+    # Learn the model multiple times. This takes some seconds to run.
+    # A trained Q table is loaded instead, if one has been saved.
+    if os.path.exists("mdp_q.json"):
+        agent.load_q("mdp_q.json")
+    else:
+        for i in range(0, 1000000):
+            agent.iterate_model()
+        agent.save_q("mdp_q.json")
+    # Print the learned Q-values.
+    agent.print_q()
+
+    # Make one iteration. Useful if you wish to step the agent to see how it behaves.
+    agent.epsilon = 0 # just exploit to see the optimal behaviour and no exploration
+    agent.reset()
+    agent.print_state()
+    agent.print_q(agent.state)
+    agent.iterate_model(print_progress = True)
+    agent.print_state()
+    agent.print_q(agent.state)
+    agent.iterate_model(print_progress = True)
@@ -0,0 +1,4 @@
+"""The POMDP agent and the driver models of assignment 13."""
+from .batch import driver_batch
+from .driver import driver
+from .pomdp import pomdp, state_encoder
@@ -0,0 +1,198 @@
+import math
+import numpy as np
+try:
+    from . import driver
+except ImportError:
+    import driver
+
+
+# Simulates N independent drivers (see driver.driver) in lockstep, for
+# sweeping parameters such as speed, obs_prob and eyes_close. The
+# positions, beliefs, actions and Q-tables of the drivers are arrays
+# with one row per driver, and each step updates all drivers with
+# array operations. The drivers that have the same speed and noise
+# share one transition table. The transition tables are also learned
+# with the random number generator of the batch, so a seed makes the
+# whole run reproducible (unless the tables are loaded from cache_dir).
+#
+# The belief states of the Q-tables are integer indices: the index of
+# the most probable position times the number of uncertainty buckets,
+# plus the bucket of the uncertainty (entropy) of the belief.
+class driver_batch():
+    def __init__(self, speeds, noise = 0, action_noise = 0, obs_prob = 0.8,
+                 eyes_close = 0, close_duration = 5, epsilon = 0.1,
+                 iters = 1000, cache_dir = None, seed = None):
+        (self.speed, self.noise, self.action_noise, self.obs_prob,
+         self.eyes_close, self.close_duration, self.epsilon) = \
+            [np.array(p, dtype=float) for p in np.broadcast_arrays(
+                speeds, noise, action_noise, obs_prob, eyes_close,
+                close_duration, epsilon)]
+        self.n = len(self.speed)
+        self.rng = np.random.default_rng(seed)
+
+        # Learn one transition table per distinct (speed, noise,
+        # action_noise), with a driver that also defines the
+        # discretisation of the positions and the actions.
+        configs = list(zip(self.speed, self.noise, self.action_noise))
+        unique = sorted(set(configs))
+        self.group = np.array([unique.index(c) for c in configs])
+        tables = []
+        for speed, noise, action_noise in unique:
+            d = driver.driver(speed)
+            d.noise = noise
+            d.action_noise = action_noise
+            tables.append(d.learn_transitions(iters, cache_dir = cache_dir,
+                                              rng = self.rng))
+        self.transitions = np.stack(tables)
+        self.template = d
+
+        self.actions = d.actions
+        self.possible_positions = d.possible_positions
+        self.threshold = d.threshold
+        self.max_pos = d.max_pos
+        self.refresh_time = d.refresh_time
+        self.alpha = d.alpha
+        self.gamma = d.gamma
+        self.n_uncertainties = d.n_uncertainties
+        b = 1/len(self.possible_positions)
+        max_ent = -math.log(b)
+        self.n_buckets = int(round(abs(max_ent*self.n_uncertainties))) + 1
+        n_states = len(self.possible_positions)*self.n_buckets
+
+        # Q-table of each driver.
+        self.q = np.zeros((self.n, n_states, len(self.actions)))
+        self.learning = True
+
+        self.clear()
+
+    # Clear the drivers, but not the Q-tables.
+    def clear(self):
+        n_pos = len(self.possible_positions)
+        self.pos = np.zeros(self.n)
+        self.pos_belief = np.full((self.n, n_pos), 1./n_pos)
+        self.state = np.zeros(self.n, dtype=int)
+        self.previous_state = np.zeros(self.n, dtype=int)
+        self.action = np.zeros(self.n, dtype=int)
+        self.previous_action = np.zeros(self.n, dtype=int)
+        self.reward = np.zeros(self.n)
+        self.steer = np.zeros(self.n)
+        self.eyes_closed = np.zeros(self.n)
+        self.iteration = 0
+        self.model_time = 0
+
+    # Index of the nearest possible position of positions.
+    def position_index(self, pos):
+        return self.template.position_index(pos)
+
+    # Position and uncertainty of belief state indices.
+    def state_values(self, state):
+        pos = self.possible_positions[state // self.n_buckets]
+        uncertainty = (state % self.n_buckets) / abs(self.n_uncertainties)
+        return pos, uncertainty
+
+    # Entropy of the belief of each driver.
+    def uncertainty(self):
+        b = self.pos_belief
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return -np.sum(np.where(b > 0, b*np.log(b), 0), axis=1)
+
+    def update_belief(self, has_attention):
+        rows = np.arange(self.n)
+        # Predict: T[:, a, :].T @ b for the table and action of each driver.
+        T = self.transitions[self.group, :, self.action, :]
+        tmp = np.einsum('njk,nj->nk', T, self.pos_belief)
+        s = tmp.sum(axis=1, keepdims=True)
+        self.pos_belief = np.where(s > 0, tmp / np.where(s > 0, s, 1), tmp)
+
+        # Observe, for the drivers that have attention.
+        true = self.rng.random(self.n) < self.obs_prob
+        observed_pos = np.where(true, self.pos, self.rng.uniform(
+            -self.max_pos, self.max_pos, self.n))
+        n_pos = len(self.possible_positions)
+        likelihood = np.repeat((self.obs_prob/(n_pos-1))[:, None], n_pos, axis=1)
+        likelihood[rows, self.position_index(observed_pos)] = self.obs_prob
+        likelihood[~has_attention] = 1
+        tmp = self.pos_belief * likelihood
+        s = tmp.sum(axis=1, keepdims=True)
+        self.pos_belief = np.where(s > 0, tmp / np.where(s > 0, s, 1), tmp)
+
+    # Observe, act, learn, and get reward, for all drivers.
+    def do_iteration(self, has_attention):
+        rows = np.arange(self.n)
+        first = self.iteration == 0
+        self.iteration += 1
+        self.model_time += self.refresh_time
+        if not first:
+            self.update_belief(has_attention)
+
+        # Discretised (max, entropy) belief state.
+        bucket = np.abs(np.rint(self.uncertainty()*self.n_uncertainties)).astype(int)
+        self.previous_state = self.state
+        self.state = np.argmax(self.pos_belief, axis=1)*self.n_buckets + bucket
+
+        # Epsilon-greedy action selection; random for unvisited states.
+        q = self.q[rows, self.state]
+        explore = (self.rng.random(self.n) < self.epsilon) | (q.sum(axis=1) == 0)
+        self.previous_action = self.action
+        self.action = np.where(explore,
+                               self.rng.integers(0, len(self.actions), self.n),
+                               np.argmax(q, axis=1))
+
+        # SARSA update.
+        if self.learning and not first:
+            previous_q = self.q[rows, self.previous_state, self.previous_action]
+            next_q = self.q[rows, self.state, self.action]
+            self.q[rows, self.previous_state, self.previous_action] = \
+                previous_q + self.alpha * (self.reward + self.gamma * next_q - previous_q)
+
+        # Update car positions according to the actions.
+        self.pos, self.steer = driver.move(
+            self.pos, self.actions[self.action], self.speed, self.noise,
+            self.action_noise, self.template.noise_bias, self.refresh_time,
+            self.max_pos, self.rng)
+        self.reward = np.where(np.abs(self.pos) >= self.threshold,
+                               -np.abs(self.pos)*2, 0)
+
+    # Run all drivers for max_time seconds of model time (like
+    # driver.run_model). Returns the traces of the model time and of
+    # the position, action, reward and attention of each driver,
+    # recorded every trace_every iterations, and the total reward of
+    # each driver.
+    def run_model(self, max_time, trace_every = 1):
+        trace = {"modeltime": [], "pos": [], "action": [], "reward": [],
+                 "attention": []}
+        total_reward = np.zeros(self.n)
+        while self.model_time < max_time:
+            # Close eyes?
+            close = (self.eyes_closed <= 0) & (self.eyes_close > 0) & \
+                    (self.rng.random(self.n) < self.eyes_close)
+            self.eyes_closed = np.where(close, self.rng.normal(
+                self.close_duration, self.close_duration / 2), self.eyes_closed)
+            eyes = ~(self.eyes_closed > 0)
+            self.eyes_closed = np.where(eyes, self.eyes_closed,
+                                        self.eyes_closed - self.refresh_time)
+            self.do_iteration(eyes)
+            total_reward += self.reward
+
+            if self.iteration % trace_every == 0:
+                trace["modeltime"].append(self.model_time)
+                trace["pos"].append(self.pos)
+                trace["action"].append(self.actions[self.action])
+                trace["reward"].append(self.reward)
+                trace["attention"].append(eyes)
+        trace = {k: np.array(v) for k, v in trace.items()}
+        return trace, total_reward
+
+
+if __name__ == "__main__":
+    # Sweep driving speeds and observation probabilities.
+    speeds, obs_probs = np.meshgrid([15, 22, 29, 33, 40], [0.2, 0.4, 0.6, 0.8, 1.0])
+    d = driver_batch(speeds.ravel(), noise = 0.01, obs_prob = obs_probs.ravel(),
+                     cache_dir = "cache", seed = 0)
+    d.run_model(10000, trace_every = 100)
+    # Evaluate without exploration.
+    d.clear()
+    d.epsilon[:] = 0
+    trace, total_reward = d.run_model(1000)
+    for s, o, r in zip(d.speed, d.obs_prob, total_reward):
+        print("speed", s, "obs_prob", o, "reward", round(r, 2))
@@ -1,8 +1,36 @@
-import pomdp
 import random
 import math
+import os
+import zlib
 import numpy as np
-from operator import itemgetter
+try:
+    from . import pomdp
+except ImportError:
+    import pomdp
+
+# The car dynamics of the driver: the position after driving for
+# refresh_time seconds with the steering wheel set to action. All
+# arguments can be arrays (e.g. one entry per simulated driver).
+# Returns the new positions and the steering wheel positions.
+def move(pos, action, speed, noise, action_noise, noise_bias = 0,
+         refresh_time = 0.150, max_pos = 2, rng = np.random):
+    size = np.broadcast(pos, action, speed, noise, action_noise).shape or None
+    # Add noise to current action based on its size (signal-
+    # dependent motor noise).
+    steer = action + np.abs(action)*rng.normal(0, action_noise, size)
+
+    # Steer cannot exceed the maximum of 0.2 radians in any case.
+    steer = np.clip(steer, -0.2, 0.2)
+
+    pos = pos + speed * refresh_time * np.sin(steer)
+
+    # Add noise to the position itself, dependent on the noise and speed.
+    pos = pos + rng.normal(noise_bias, noise, size)*speed
+
+    # Keep within the state space bounds.
+    pos = np.clip(pos, -max_pos, max_pos)
+    return pos, steer
+
 
 class driver(pomdp.pomdp):
     def __init__(self, speed):
@@ -38,11 +66,12 @@ class driver(pomdp.pomdp):
         self.possible_positions = np.linspace(-self.max_pos, self.max_pos, 2*self.max_pos*self.resolution+1)
 
         # The transition model stores the state-action->state->p
-        # transition probabilities, with state as an index, and as
-        # values a new table, that has action as an index and
-        # state-probability tuples as values. These values are trained
-        # with full observability before training the Q-table.
-        self.transitions = []
+        # transition probabilities as a (positions, actions, positions)
+        # array, indexed by the indices of the positions in
+        # possible_positions and of the actions in actions. These
+        # values are trained with full observability before training
+        # the Q-table.
+        self.transitions = None
 
         # How many discrete entropy or uncertainty values in the
         # Q-table ? Set this value by hand, and it is then calculated
@@ -72,8 +101,14 @@ class driver(pomdp.pomdp):
         # The super's belief takes care of Q-table handling, but not
         # belief update. The super's belief is the augmented
         # (max,entropy) state, and this is the belief distribution
-        # over possible discrete positions.
-        self.pos_belief = {}
+        # over possible discrete positions, as a vector indexed like
+        # possible_positions.
+        self.pos_belief = None
+
+        # Observation likelihoods of the positions (columns) for each
+        # observed position (rows), computed for obs_prob.
+        self.likelihood = None
+        self.likelihood_obs_prob = None
 
         # For output, log the current simulated model time, car x
         # position (0 = middle of the road), action (set steering
@@ -89,10 +124,10 @@ class driver(pomdp.pomdp):
         self.pos = 0       # 0 is the centre of the road
         self.iteration = 0
         self.model_time = 0
+        self.eyes_closed = 0
         super().clear()
         init_prob = 1./len(self.possible_positions)
-        for p in self.possible_positions:
-            self.pos_belief[p] = init_prob
+        self.pos_belief = np.full(len(self.possible_positions), init_prob)
 
     # Observe, act, learn, and get reward.
     def do_iteration(self, debug = False, has_attention = True):
@@ -102,11 +137,11 @@ class driver(pomdp.pomdp):
         # Get entropy / uncertainty, and discretisise it.
         uncertainty = round(self.uncertainty() * self.n_uncertainties) / self.n_uncertainties
         # Create the discretitised (max,entropy) belief state for storing in Q-table.
-        belief = [max(self.pos_belief.items(), key=itemgetter(1))[0], uncertainty]
+        belief = [self.possible_positions[np.argmax(self.pos_belief)], uncertainty]
         self.set_belief_state(belief)
 
         if debug == True:
-            print("Car belief:",self.belief)
+            print("Car belief:",self.encoder.decode(self.belief))
             print("Car q:",self.q[self.belief])
 
         self.choose_action_epsilon()
@@ -122,58 +157,73 @@ class driver(pomdp.pomdp):
                                                  self.action, self.steer, self.reward, has_attention))
 
     # Learn the transitions by iterating all positions and simulating
-    # the result of actions.
-    def learn_transitions(self, iters, output_progress = False):
-        # Init transition table.
-        self.transitions = {}
-        for pos in self.possible_positions:
-            self.transitions[pos] = {}
-            for a in self.actions:
-                self.transitions[pos][a] = {}
-                for pos2 in self.possible_positions:
-                    self.transitions[pos][a][pos2] = 0
-
-        # Iterate through all positions,action combinations and
-        # observe the outcome multiple times.
-        for a in self.actions:
-            if output_progress: print("Creating transitions for", a)
-            for pos in self.possible_positions:
-                # Finer discrete positions within the represented belief.
-                for pos_fine in np.linspace(-1/self.resolution+0.001,1/self.resolution-0.001,10):
-                    for i in range(iters):
-                        self.pos = pos + pos_fine
-                        self.action = a
-                        self.update_car_pos()
-                        new_pos = round(self.pos*self.resolution) / self.resolution
-                        self.transitions[pos][self.action][new_pos] += 1
+    # the result of actions. All the samples are simulated at once,
+    # and binned to the nearest possible position. If cache_dir is
+    # given, the transition table is saved there, and loaded instead
+    # of learned when the parameters of the model are the same. The
+    # samples are drawn from rng (np.random by default).
+    def learn_transitions(self, iters, output_progress = False, cache_dir = None,
+                          rng = np.random):
+        if cache_dir is not None:
+            filename = os.path.join(cache_dir, self.transitions_key(iters) + ".npy")
+            if os.path.exists(filename):
+                if output_progress: print("Loading transitions from", filename)
+                self.transitions = np.load(filename)
+                self.clear()
+                return self.transitions
+
+        n_pos = len(self.possible_positions)
+        n_act = len(self.actions)
+        # Finer discrete positions within the represented belief.
+        pos_fine = np.linspace(-1/self.resolution+0.001,1/self.resolution-0.001,10)
+        # Samples for each (position, action, fine position, iteration).
+        pos = np.broadcast_to((self.possible_positions[:,None,None,None] +
+                               pos_fine[None,None,:,None]),
+                              (n_pos, n_act, len(pos_fine), iters))
+        action = self.actions[None,:,None,None]
+        if output_progress: print("Creating transitions for", pos.size, "samples")
+        new_pos, _ = self.move(pos, action, rng)
+
+        # Count the new positions of each (position, action) pair.
+        new_index = self.position_index(new_pos)
+        pair = np.arange(n_pos*n_act).reshape(n_pos, n_act, 1, 1)
+        counts = np.bincount((pair*n_pos + new_index).ravel(),
+                             minlength=n_pos*n_act*n_pos).reshape(n_pos, n_act, n_pos)
 
         # Normalise transition table.
-        for pos in self.possible_positions:
-            for a in self.actions:
-                if sum(self.transitions[pos][a].values()) > 0:
-                    factor=1.0/sum(self.transitions[pos][a].values())
-                    for pos2 in self.transitions[pos][a].keys():
-                        self.transitions[pos][a][pos2] = self.transitions[pos][a][pos2]*factor
+        totals = counts.sum(axis=2, keepdims=True)
+        self.transitions = counts / np.maximum(totals, 1)
 
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(filename, self.transitions)
         self.clear()
+        return self.transitions
+
+    # The name of the cached transition table: the speed, noise,
+    # action noise and resolution, and a checksum of the other
+    # parameters the transitions depend on.
+    def transitions_key(self, iters):
+        others = repr((iters, self.noise_bias, self.max_pos, self.refresh_time,
+                       list(self.actions))).encode()
+        return "transitions_{}_{}_{}_{}_{:08x}".format(
+            self.speed, self.noise, self.action_noise, self.resolution,
+            zlib.crc32(others))
+
+    # Index of the nearest possible position of positions.
+    def position_index(self, pos):
+        return (np.round(np.asarray(pos)*self.resolution) +
+                self.max_pos*self.resolution).astype(int)
+
+    # Simulate the effect of actions on positions. Works for single
+    # positions and for arrays of positions and actions. Returns the
+    # new positions and the steering wheel positions.
+    def move(self, pos, action, rng = np.random):
+        return move(pos, action, self.speed, self.noise, self.action_noise,
+                    self.noise_bias, self.refresh_time, self.max_pos, rng)
 
     def update_car_pos(self):
-        # Add noise to current action based on its size (signal-
-        # dependent motor noise).
-        self.steer = self.action + abs(self.action)*np.random.normal(0, self.action_noise)
-
-        # Steer cannot exceed the maximum of 0.2 radians in any case.
-        self.steer = max(-0.2,self.steer)
-        self.steer = min(self.steer, 0.2)
-
-        self.pos += self.speed * self.refresh_time * math.sin(self.steer)
-
-        # Add noise to the position itself, dependent on the noise and speed.
-        self.pos += np.random.normal(self.noise_bias, self.noise)*self.speed
-
-        # Keep within the state space bounds.
-        if self.pos > self.max_pos: self.pos = self.max_pos
-        if self.pos < 0 and -self.pos > self.max_pos: self.pos = -self.max_pos
+        self.pos, self.steer = self.move(self.pos, self.action)
         return self.pos
 
     def calculate_reward(self):
@@ -190,22 +240,15 @@ class driver(pomdp.pomdp):
     # Update the belief distribution of where the car is currently.
     # This depends on whether the driving model has attention or not.
     def update_belief(self, has_attention):
-        # Use the model to predict positions.        
+        # Use the model to predict positions.
         if self.action != None:
-            # Have to create a new dict, because adjacent positions
-            # influence each other, so have to wait until all beliefs
-            # are calculated before updating beliefs.
-            tmp = {}
-
-            for b in self.pos_belief.keys():
-                total_prob = 0
-                for pos1 in self.transitions:
-                    total_prob += self.transitions[pos1][self.action][b] * self.pos_belief[pos1]
-                tmp[b] = total_prob
+            # The new belief of each position sums the transitions from
+            # all positions, weighted by their current belief.
+            tmp = self.transitions[:, self.action_id, :].T @ self.pos_belief
 
             # Normalise and put back to pos_belief.
-            s = sum(tmp.values(), 0.0)
-            if s > 0: self.pos_belief = {k: v / s for k, v in tmp.items()}
+            s = tmp.sum()
+            if s > 0: self.pos_belief = tmp / s
             else: self.pos_belief = tmp
 
         # If the driver has attention, use the observation of the
@@ -216,55 +259,62 @@ class driver(pomdp.pomdp):
                 observed_pos = self.pos
             else:
                 observed_pos = random.uniform(-self.max_pos, self.max_pos)
-            
-            for b in self.pos_belief.keys():
-                # Bayes update. Increase the probability of the
-                # current position, decrease others.
-                if self.resolution*b == round(observed_pos*self.resolution):
-                    # Note. Also trusting the model-based prior belief
-                    # here, not just the observation.
-                    self.pos_belief[b] = self.obs_prob*self.pos_belief[b]
-                else:
-                    # other positions
-                    self.pos_belief[b] = (self.obs_prob/(len(self.pos_belief)-1))*self.pos_belief[b]
 
-            # Normalise
-            s = sum(self.pos_belief.values(), 0.0)
-            if s > 0: self.pos_belief = {k: v / s for k, v in self.pos_belief.items()}
+            # Bayes update. Increase the probability of the current
+            # position, decrease others. Note. Also trusting the
+            # model-based prior belief here, not just the observation.
+            self.pos_belief = self.pos_belief * \
+                self.observation_likelihood()[self.position_index(observed_pos)]
 
+            # Normalise
+            s = self.pos_belief.sum()
+            if s > 0: self.pos_belief = self.pos_belief / s
+
+    # The likelihood of each position given each observed position:
+    # obs_prob for the observed position, and obs_prob divided by the
+    # number of other positions for the others.
+    def observation_likelihood(self):
+        if self.likelihood_obs_prob != self.obs_prob:
+            n = len(self.possible_positions)
+            self.likelihood = np.full((n, n), self.obs_prob/(n-1))
+            np.fill_diagonal(self.likelihood, self.obs_prob)
+            self.likelihood_obs_prob = self.obs_prob
+        return self.likelihood
 
     # Driving model's uncertainty is the entropy of the belief distribution.
     def uncertainty(self):
-        ent = 0
-        for b in self.pos_belief.values():
-            # sometimes the belief is so small it is rounded to 0
-            if b > 0:
-                ent += b * math.log(b)
-        return -ent    
+        # sometimes the belief is so small it is rounded to 0
+        b = self.pos_belief[self.pos_belief > 0]
+        return -np.sum(b * np.log(b))
 
     # eyes_close is the probability of closing eyes, the duration, in
     # seconds is sampled from normal distribution with mean of
     # close_duration, and sd of half that.
+    #
+    # If checkpoint is given, the model is saved to that file every
+    # checkpoint_every seconds of model time and at the end. Loading
+    # a checkpoint with restore_rng = True and calling run_model again
+    # resumes the run.
     def run_model(self, max_time, eyes_close = 0, close_duration = 5, output_progress = False,
-                  visualise = False):
-        print_time = 0
-        eyes_closed = 0
+                  visualise = False, checkpoint = None, checkpoint_every = 1000):
+        print_time = self.model_time
+        checkpoint_time = self.model_time + checkpoint_every
         sum_reward = 0
         sum_actions = 0
         while self.model_time < max_time:
             if output_progress and self.model_time >= print_time:
 
                 print("Running model... ", round(self.model_time / max_time, 2),
-                      len(self.q), round(sum_reward), round(sum_actions,3))
+                      len(self.encoder), round(sum_reward), round(sum_actions,3))
                 print_time += max_time / 10
                 sum_reward = 0
                 sum_actions = 0
 
             # Close eyes?
-            if eyes_closed <= 0 and eyes_close > 0 and random.random() < eyes_close:
-                eyes_closed = np.random.normal(close_duration, close_duration / 2)
-            if eyes_closed > 0:
-                eyes_closed -= self.refresh_time
+            if self.eyes_closed <= 0 and eyes_close > 0 and random.random() < eyes_close:
+                self.eyes_closed = np.random.normal(close_duration, close_duration / 2)
+            if self.eyes_closed > 0:
+                self.eyes_closed -= self.refresh_time
                 eyes = False
             else:
                 eyes = True
@@ -273,43 +323,84 @@ class driver(pomdp.pomdp):
             if self.reward: sum_reward += self.reward
             if self.action: sum_actions += abs(self.action)
 
+            if checkpoint and self.model_time >= checkpoint_time:
+                self.save(checkpoint)
+                checkpoint_time += checkpoint_every
+        if checkpoint:
+            self.save(checkpoint)
+
+    # Checkpoints also store the transition table, the car and its
+    # belief, the clock, and the parameters of the driver. The
+    # discretisation of the positions and the threshold must be the
+    # same when loading, as the belief states depend on them.
+    def get_checkpoint(self):
+        data = super().get_checkpoint()
+        if self.transitions is not None:
+            data["transitions"] = self.transitions
+        data["pos_belief"] = self.pos_belief
+        data["driver"] = np.array([self.pos, self.steer if hasattr(self, "steer") else 0,
+                                   self.model_time, self.iteration, self.eyes_closed])
+        data["parameters"] = np.array([self.speed, self.noise, self.noise_bias,
+                                       self.action_noise, self.obs_prob])
+        data["discretisation"] = np.array([self.resolution, self.max_pos, self.threshold])
+        return data
+
+    def set_checkpoint(self, data, restore_rng = False):
+        resolution, max_pos, threshold = data["discretisation"].tolist()
+        if (resolution, max_pos, threshold) != (self.resolution, self.max_pos, self.threshold):
+            raise ValueError("The checkpoint has resolution {}, max_pos {} and threshold {}".format(
+                resolution, max_pos, threshold))
+        super().set_checkpoint(data, restore_rng)
+        if "transitions" in data:
+            self.transitions = data["transitions"]
+        self.pos_belief = data["pos_belief"].copy()
+        self.pos, self.steer, self.model_time, iteration, self.eyes_closed = \
+            data["driver"].tolist()
+        self.iteration = int(iteration)
+        (self.speed, self.noise, self.noise_bias, self.action_noise,
+         self.obs_prob) = data["parameters"].tolist()
+
     def dump_q(self, filename):
         out = open(filename, "w")
         out.write("pos uncertainty action q\n")
-        for s in self.q:
-            s_split = s.split(",")
-            s_pos = s_split[0].replace("[","").strip()
-            s_ent = s_split[1].replace("]","").strip()
-            for a in self.q[s]:
-                out.write("{} {} {} {}".format(s_pos,s_ent,a,self.q[s][a]) + "\n")
+        for s, (s_pos, s_ent) in enumerate(self.encoder.states):
+            for a, action in enumerate(self.actions):
+                out.write("{} {} {} {}".format(s_pos,s_ent,action,self.q[s][a]) + "\n")
         out.close()
 
-# Subgoal 1. Investigate different driving speeds.
-# Create the driver, driving at x m/s.
-d = driver(33)
-d.noise = 0.01
-d.action_noise = 0
-# Learn the transition table: given current belief distribution and an
-# action, what is the new belief distribution.
-d.learn_transitions(1000, output_progress = True)
-d.log_data = True
-# Use q-learning to learn.
-d.run_model(100000, output_progress = True)
-d.write_data_to_file("driver33.csv")
-
-# Subgoal 2. First train, then simulate.
-# d = discrete_driver(22)
-# d.noise = 0.01
-# d.action_noise = 0
-# d.obs_prob = 0.3
-# # Learn the transition table: given current belief distribution and an
-# # action, what is the new belief distribution.
-# d.learn_transitions(1000, output_progress = True)
-# # Use q-learning to learn.
-# d.run_model(100000, output_progress = True)
-# # Run the model with no exploration (only exploit, i.e., drive as safely as possible).
-# d.clear()
-# d.log_data = True
-# d.epsilon = 0
-# d.run_model(10000, output_progress = True)
-# d.write_data_to_file("driver22_o3.csv")
+
+if __name__ == "__main__":
+    # Subgoal 1. Investigate different driving speeds.
+    # Create the driver, driving at x m/s.
+    d = driver(33)
+    d.noise = 0.01
+    d.action_noise = 0
+    # Learn the transition table: given current belief distribution and an
+    # action, what is the new belief distribution.
+    d.learn_transitions(1000, output_progress = True, cache_dir = "cache")
+    # The logged data is written to the CSV file at each checkpoint.
+    d.log_data = True
+    d.data_file = "driver33.csv"
+    # Use q-learning to learn. An interrupted run is resumed from its
+    # last checkpoint, and a finished run is not run again.
+    if os.path.exists("driver33.npz"):
+        d.load("driver33.npz", restore_rng = True)
+    if d.model_time < 100000:
+        d.run_model(100000, output_progress = True, checkpoint = "driver33.npz")
+
+    # Subgoal 2. First train, then simulate.
+    # d = discrete_driver(22)
+    # d.noise = 0.01
+    # d.action_noise = 0
+    # d.obs_prob = 0.3
+    # # Learn the transition table: given current belief distribution and an
+    # # action, what is the new belief distribution.
+    # d.learn_transitions(1000, output_progress = True)
+    # # Use q-learning to learn.
+    # d.run_model(100000, output_progress = True)
+    # # Run the model with no exploration (only exploit, i.e., drive as safely as possible).
+    # d.clear()
+    # d.log_data = True
+    # d.epsilon = 0
+    # d.run_model(10000, output_progress = True)
+    # d.write_data_to_file("driver22_o3.csv")
@@ -1,8 +1,29 @@
-from operator import itemgetter # getting max q from a dict
 import math
+import os
 import random
 import numpy as np
 
+# Maps hashable states, e.g. discretised (max position, uncertainty)
+# tuples, to consecutive integer ids, in the order they are first
+# encoded.
+class state_encoder():
+    def __init__(self):
+        self.ids = {}
+        self.states = []
+
+    def __len__(self):
+        return len(self.states)
+
+    def encode(self, state):
+        i = self.ids.get(state)
+        if i is None:
+            i = self.ids[state] = len(self.states)
+            self.states.append(state)
+        return i
+
+    def decode(self, i):
+        return self.states[i]
+
 class pomdp():
     def __init__(self, alpha, gamma, actions, epsilon = 0.1, softmax_temp = 1.5):
         self.alpha = alpha
@@ -13,12 +34,21 @@ class pomdp():
 
         self.softmax_temp = softmax_temp
 
-        self.q = {}
+        # Q table has a row for each belief state id (see
+        # state_encoder) and a column for each action index. Rows are
+        # allocated in growing blocks, and only the first
+        # len(self.encoder) rows are in use.
+        self.encoder = state_encoder()
+        self.q = np.zeros((64, len(actions)))
 
         self.context = ""
 
         self.data = []
         self.data_header = None
+        # If data_file is set, save() appends the logged rows to it
+        # (see flush_data), and data_offset is its size after them.
+        self.data_file = None
+        self.data_offset = 0
         self.log_data = False
         self.log_data_hooks = False
         self.log_hooks = []
@@ -34,6 +64,8 @@ class pomdp():
     def clear(self):
         self.action = None
         self.previous_action = None
+        self.action_id = None
+        self.previous_action_id = None
         self.belief = None
         self.previous_belief = None
 
@@ -55,74 +87,86 @@ class pomdp():
         if clean:
             self.data = []
 
+    # Append the logged rows to data_file, after the header if the file
+    # is new, and clear them. The file is first cut to data_offset, so
+    # that a run resumed from a checkpoint drops the rows that were
+    # written after the checkpoint.
+    def flush_data(self):
+        with open(self.data_file, "r+b" if self.data_offset else "wb") as out:
+            out.seek(self.data_offset)
+            out.truncate()
+            if self.data_offset == 0 and self.data_header:
+                out.write((self.data_header + "\n").encode())
+            for d in self.data:
+                out.write((d + "\n").encode())
+            self.data_offset = out.tell()
+        self.data = []
+
     # Reinforcement learning
 
+    # The rows of the Q table in use.
+    def q_table(self):
+        return self.q[:len(self.encoder)]
+
     def calculate_max_q_value(self):
-        return max(self.q[self.belief].items(), key=itemgetter(1))
+        i = np.argmax(self.q[self.belief])
+        return self.actions[i], self.q[self.belief, i]
 
     def current_q(self):
-        return self.q[self.belief][self.action]
+        return self.q[self.belief, self.action_id]
 
     # Get the smallest best action Q.
     def min_q(self):
-        smallest = None
-        for b in self.q:            
-            candidate = max(self.q[b].items(), key=itemgetter(1))[1]
-            if smallest and candidate < smallest:
-                smallest = candidate
-            elif not smallest:
-                smallest = candidate
-        return smallest
+        q = self.q_table()
+        return q.max(axis=1).min() if len(q) else None
 
     def max_q(self):
-        largest = None
-        for b in self.q:
-            for a in self.q[b]:
-                if largest and self.q[b][a] > largest:
-                    largest = self.q[b][a]
-                elif not largest:
-                    largest = self.q[b][a]
-        return largest
+        q = self.q_table()
+        return q.max() if len(q) else None
 
     def update_q_learning(self, rounding = 10):
-        if self.previous_action != None and self.learning:
-            previous_q = self.q[self.previous_belief][self.previous_action]
-            next_q = self.calculate_max_q_value()[1]
-            self.q[self.previous_belief][self.previous_action] = \
+        if self.previous_action_id != None and self.learning:
+            previous = (self.previous_belief, self.previous_action_id)
+            previous_q = self.q[previous]
+            next_q = self.q[self.belief].max()
+            self.q[previous] = \
                 round(previous_q + self.alpha * (self.reward + self.gamma * next_q - previous_q), rounding)
-            return self.q[self.previous_belief][self.previous_action]
+            return self.q[previous]
         else:
             return None
 
     def update_q_sarsa(self, rounding = 10, debug = False):
-        if self.previous_action != None and self.learning:
-            previous_q = self.q[self.previous_belief][self.previous_action]
-            if debug: print("Updating q for",self.previous_belief,self.previous_action, "reward =",self.reward)
+        if self.previous_action_id != None and self.learning:
+            previous = (self.previous_belief, self.previous_action_id)
+            previous_q = self.q[previous]
+            if debug: print("Updating q for",self.encoder.decode(self.previous_belief),self.previous_action, "reward =",self.reward)
             if debug: print("Previous q:", previous_q)
-            next_q = self.q[self.belief][self.action]
-            self.q[self.previous_belief][self.previous_action] = \
+            next_q = self.q[self.belief, self.action_id]
+            self.q[previous] = \
                 previous_q + self.alpha * (self.reward + self.gamma * next_q - previous_q)
-            if debug: print("New q     :", self.q[self.previous_belief][self.previous_action])
-            return self.q[self.previous_belief][self.previous_action]
+            if debug: print("New q     :", self.q[previous])
+            return self.q[previous]
         else:
             return None
 
     def update_q_td(self, rounding = 10):
         if self.learning:
-            previous_q = self.q[self.belief][self.action]
-            self.q[self.belief][self.action] = \
-                round(previous_q + self.alpha * (self.reward - previous_q), rounding)
-            return self.q[self.belief][self.action]
+            current = (self.belief, self.action_id)
+            self.q[current] = \
+                round(self.q[current] + self.alpha * (self.reward - self.q[current]), rounding)
+            return self.q[current]
 
     # Action selection
 
     def choose_action_epsilon(self):
-        if self.action != None:
-            self.previous_action = self.action            
-        if random.random() < self.epsilon or sum(self.q[self.belief].values()) == 0:
-            self.action = random.choice(self.actions)            
+        if self.action_id != None:
+            self.previous_action = self.action
+            self.previous_action_id = self.action_id
+        if random.random() < self.epsilon or self.q[self.belief].sum() == 0:
+            self.action_id = random.randrange(len(self.actions))
         else:
-            self.action = self.calculate_max_q_value()[0]
+            self.action_id = np.argmax(self.q[self.belief])
+        self.action = self.actions[self.action_id]
         return self.action
 
     # Need this for softmax in case that actions are lists, because
@@ -145,19 +189,102 @@ class pomdp():
     
     # Belief management
 
-    # Update belief to q if it does not exist, init with all actions = 0.0.
+    # Add a row to q for a new belief (state id), init with all
+    # actions = 0.0.
     def update_q(self, belief):
-        if belief not in self.q:
-            self.q[belief] = {}
-            for action in self.actions:
-                self.q[belief][action] = 0.0
+        if belief >= len(self.q):
+            grown = np.zeros((2*len(self.q), len(self.actions)))
+            grown[:len(self.q)] = self.q
+            self.q = grown
         return self.q
 
-    # Create a belief state from a list of states such that it is
-    # hashable.
+    # Create a belief state from a list of states: its integer id in
+    # the encoder.
     def set_belief_state(self, states):
         if self.belief != None:
             self.previous_belief = self.belief
-        self.belief = repr(states)
+        self.belief = self.encoder.encode(tuple(states))
         self.update_q(self.belief)
         return self.belief
+
+    # Saving and loading
+
+    # The states of the encoder as a (states, width) array. The width
+    # is that of the first state, and 0 if there are no states yet.
+    def state_array(self):
+        if len(self.encoder) == 0:
+            return np.empty((0, 0))
+        return np.array(self.encoder.states, dtype=float).reshape(len(self.encoder), -1)
+
+    # The arrays that save() writes: the Q table, the states of the
+    # encoder (tuples of numbers), the current and previous belief
+    # state and action (-1 for none), the actions, the reward, the
+    # size of the data file, and the states of the random number
+    # generators.
+    def get_checkpoint(self):
+        none = lambda x: -1 if x is None else x
+        py_state = random.getstate()
+        np_state = np.random.get_state()
+        return {
+            "q": self.q_table(),
+            "states": self.state_array(),
+            "agent": np.array([none(self.belief), none(self.previous_belief),
+                               none(self.action_id), none(self.previous_action_id)]),
+            "reward": np.array(getattr(self, "reward", 0.0) or 0.0),
+            "actions": np.asarray(self.actions, dtype=float),
+            "epsilon": np.array(self.epsilon),
+            "data_offset": np.array(self.data_offset),
+            "py_random": np.array(py_state[1], dtype=np.uint64),
+            "py_gauss": np.array(np.nan if py_state[2] is None else py_state[2]),
+            "np_random": np_state[1],
+            "np_random_pos": np.array(np_state[2:4]),
+            "np_random_gauss": np.array(np_state[4]),
+        }
+
+    # The random number generators are restored only if restore_rng
+    # is set, to resume a run exactly where it was saved. Raises
+    # ValueError if the checkpoint has different actions.
+    def set_checkpoint(self, data, restore_rng = False):
+        if not np.array_equal(data["actions"], np.asarray(self.actions, dtype=float)):
+            raise ValueError("The checkpoint has different actions: {}".format(
+                data["actions"].tolist()))
+        self.encoder = state_encoder()
+        for state in data["states"]:
+            self.encoder.encode(tuple(state))
+        self.q = np.zeros((max(64, len(self.encoder)), len(self.actions)))
+        self.q[:len(self.encoder)] = data["q"]
+
+        none = lambda x: None if x < 0 else int(x)
+        self.belief, self.previous_belief, self.action_id, self.previous_action_id = \
+            [none(x) for x in data["agent"]]
+        self.action = None if self.action_id is None else self.actions[self.action_id]
+        self.previous_action = None if self.previous_action_id is None else \
+            self.actions[self.previous_action_id]
+        self.reward = float(data["reward"])
+        self.epsilon = float(data["epsilon"])
+        self.data_offset = int(data["data_offset"])
+
+        if not restore_rng:
+            return
+        gauss = float(data["py_gauss"])
+        random.setstate((3, tuple(int(x) for x in data["py_random"]),
+                         None if math.isnan(gauss) else gauss))
+        pos, has_gauss = data["np_random_pos"]
+        np.random.set_state(("MT19937", data["np_random"], int(pos),
+                             int(has_gauss), float(data["np_random_gauss"])))
+
+    # Save the model to a .npz file. The file is replaced only when
+    # it has been completely written, so an interrupted save keeps
+    # the previous checkpoint. The logged rows are first appended to
+    # data_file, if it is set.
+    def save(self, filename):
+        if self.data_file is not None:
+            self.flush_data()
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as out:
+            np.savez(out, **self.get_checkpoint())
+        os.replace(tmp, filename)
+
+    def load(self, filename, restore_rng = False):
+        with np.load(filename) as data:
+            self.set_checkpoint(data, restore_rng)